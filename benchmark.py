@@ -0,0 +1,280 @@
+import os, sys, random, time, argparse, json, platform
+
+os.environ["FLAPPY_HEADLESS"] = "1" # benchmarks never open a window (SDL dummy driver)
+
+import numpy as np
+import pygame, neat
+import flappy_bird_ai as ai
+import flappy_assets, flappy_render
+
+from flappy_core import Bird, Pipe, Base, BIRD_SIZE, WIN_WIDTH, WIN_HEIGHT
+from flappy_population import BirdPopulation, collide_population
+from flappy_nn import BatchNetwork
+from flappy_policy import export
+from flappy_profile import ProfileLog
+from flappy_render import TextCache, DirtyRenderer
+
+# every benchmark is seeded, so two runs of the same code simulate, collide and draw exactly the same things
+# results are rates (higher is better) and go to a JSON file that --compare checks a later run against
+LOCAL_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(LOCAL_DIR, "config-feedforward.txt")
+
+# best wall time of repeat calls of fn - the least disturbed run is the one closest to the code's real cost
+def best_time(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def result(unit, count, seconds):
+    return {"unit": unit, "value": count / seconds, "count": count, "seconds": seconds}
+
+# a mid-game God Mode scene: 100 birds spread around the gap, two pipes and the base
+def make_scene(n=100, seed=0):
+    rng = random.Random(seed)
+    birds = BirdPopulation(n, 230, 350)
+    birds.y = np.array([rng.uniform(150, 600) for _ in range(n)])
+    birds.tilt = np.array([rng.choice([25, 5, -15, -35, -55, -75, -95]) for _ in range(n)], dtype=float)
+    pipes = [Pipe(300, rng), Pipe(600, rng)]
+    return birds, pipes, Base(730)
+
+# a population of genomes grown a little past the config's starting networks, so they have hidden nodes
+def make_genomes(config, n=100, seed=0):
+    random.seed(seed)
+    genomes = []
+    for key in range(n):
+        g = neat.DefaultGenome(key)
+        g.configure_new(config.genome_config)
+        for _ in range(10):
+            g.mutate(config.genome_config)
+        genomes.append(g)
+    return genomes
+
+# flap pattern of n birds over frames - each bird flaps about every 12 frames, like a bird holding its height
+def make_flaps(frames, n, seed=0):
+    return np.random.default_rng(seed).random((frames, n)) < 1 / 12
+
+# Bird.move one bird at a time and BirdPopulation.move for the whole flock - bird·frames per second
+def bench_move(frames, repeat, seed=0, n=100):
+    flaps = make_flaps(frames, n, seed)
+    flap_rows = flaps.tolist()
+
+    def single():
+        birds = [Bird(230, 350) for _ in range(n)]
+        for row in flap_rows:
+            for bird, flap in zip(birds, row):
+                bird.move()
+                if flap:
+                    bird.jump()
+
+    def population():
+        birds = BirdPopulation(n, 230, 350)
+        for row in flaps:
+            birds.move()
+            birds.jump(row)
+
+    return {"bird_move": result("bird·frames/s", frames * n, best_time(single, repeat)),
+            "population_move": result("bird·frames/s", frames * n, best_time(population, repeat))}
+
+# Pipe.collide on birds placed in and around a pipe's columns, and collide_population on the same positions
+# - collision checks per second, most of them reach the pixel test
+def bench_collide(checks, repeat, seed=0, n=100):
+    rng = random.Random(seed)
+    cases = [] # (pipe, [bird ys])
+    for _ in range(checks // n):
+        pipe = Pipe(rng.randrange(230 - Pipe.WIDTH, 230 + BIRD_SIZE[0]), rng)
+        cases.append((pipe, [rng.uniform(pipe.height - 60, pipe.bottom + 10) for _ in range(n)]))
+    count = len(cases) * n
+    bird = Bird(230, 350)
+    bird.img = 1
+
+    def single():
+        for pipe, ys in cases:
+            for y in ys:
+                bird.y = y
+                pipe.collide(bird)
+
+    birds = BirdPopulation(n, 230, 350)
+    birds.img[:] = 1
+    arrays = [(pipe, np.array(ys)) for pipe, ys in cases]
+
+    def population():
+        for pipe, ys in arrays:
+            birds.y = ys
+            collide_population(pipe, birds)
+
+    return {"pipe_collide": result("checks/s", count, best_time(single, repeat)),
+            "population_collide": result("checks/s", count, best_time(population, repeat))}
+
+# FeedForwardNetwork.activate net by net, the same nets exported as flappy_policy policies
+# and BatchNetwork.activate for the population - activations per second
+def bench_activate(frames, repeat, seed=0, n=100):
+    config = ai.load_config(CONFIG_PATH)
+    genomes = make_genomes(config, n, seed)
+    nets = [neat.nn.FeedForwardNetwork.create(g, config) for g in genomes]
+    policies = [export(g, config) for g in genomes]
+    batch = BatchNetwork(nets)
+    inputs = np.random.default_rng(seed).uniform(0, 800, (frames, n, batch.num_inputs))
+    rows = inputs.tolist()
+
+    def single():
+        for frame in rows:
+            for net, row in zip(nets, frame):
+                net.activate(row)
+
+    def policy():
+        for frame in rows:
+            for p, row in zip(policies, frame):
+                p.activate(row)
+
+    def population():
+        for frame in inputs:
+            batch.activate(frame)
+
+    return {"activate": result("activations/s", frames * n, best_time(single, repeat)),
+            "policy_activate": result("activations/s", frames * n, best_time(policy, repeat)),
+            "batch_activate": result("activations/s", frames * n, best_time(population, repeat))}
+
+# one headless generation of flappy_bird_ai.main on a fresh seeded population - bird·frames per second
+def bench_generation(repeat, seed=0):
+    config = ai.load_config(CONFIG_PATH)
+
+    def generation():
+        random.seed(seed) # same genomes and the same pipes every run
+        genomes = list(neat.Population(config).population.items())
+        start = time.perf_counter()
+        ai.main(genomes, config)
+        return time.perf_counter() - start
+
+    # count what one generation simulates with the profiler, then time it without
+    profile, gen = ai.PROFILE, ai.GEN
+    try:
+        ai.PROFILE = ProfileLog()
+        generation()
+        row = ai.PROFILE.rows[-1]
+        ai.PROFILE = None
+        seconds = min(generation() for _ in range(repeat))
+    finally:
+        ai.PROFILE, ai.GEN = profile, gen
+    generation_result = result("bird·frames/s", row["bird_frames"], seconds)
+    generation_result["frames"] = row["frames"]
+    return {"headless_generation": generation_result}
+
+PARALLEL_WORKERS = (1, 2, 4, 8)
+
+# what splitting a generation into ParallelEvaluator's batches can gain - every batch of w workers is played alone, one
+# after the other, and the slowest one is the generation's wall time on w free cores - genomes per second
+# a batch of few birds costs nearly as much as the whole flock: a frame's work is mostly per frame, not per bird, and the
+# batch with the best bird plays the whole game
+def bench_parallel(repeat, seed=0, n=150):
+    config = ai.load_config(CONFIG_PATH)
+    genomes = [(g.key, g) for g in make_genomes(config, n, seed)]
+    results = {}
+    for workers in PARALLEL_WORKERS:
+        batches = [genomes[i::workers] for i in range(workers)]
+        seconds = max(best_time(lambda: ai.eval_batch(batch, config, seed), repeat) for batch in batches)
+        results["parallel_{0}_workers".format(workers)] = result("genomes/s", n, seconds)
+    for r in results.values():
+        r["speedup"] = r["value"] / results["parallel_1_workers"]["value"]
+    return results
+
+# draw_window with the 100 bird scene, the HUD values change every frame like they do in training
+def time_draw_window(win, frames, seed=0):
+    birds, pipes, base = make_scene(seed=seed)
+    screen = DirtyRenderer(win, flappy_assets.load().BG_IMG)
+    start = time.perf_counter()
+    for frame in range(frames):
+        flappy_render.draw_window(screen, birds, pipes, base, frame // 90, 7, np.count_nonzero(birds.alive), round(frame * 0.37, 2), round(frame * 0.1, 2))
+    return time.perf_counter() - start
+
+# frames per second of draw_window with HUD text rendered on every frame (uncached) and with the TextCache
+def bench_render(frames, repeat, seed=0):
+    win = pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT))
+    cache = flappy_render.TEXT
+    try:
+        flappy_render.TEXT = TextCache(0)
+        uncached = min(time_draw_window(win, frames, seed) for _ in range(repeat))
+        flappy_render.TEXT = TextCache()
+        cached = min(time_draw_window(win, frames, seed) for _ in range(repeat))
+    finally:
+        flappy_render.TEXT = cache
+    return {"draw_window_uncached_hud": result("frames/s", frames, uncached),
+            "draw_window": result("frames/s", frames, cached)}
+
+# images and collision masks decoded from images/ and loaded from the atlas - loads per second (1 / cold start)
+def bench_assets(repeat):
+    timings = flappy_assets.measure(repeat)
+    return {"assets_decode": result("loads/s", 1, timings["decode images"] + timings["decode masks"]),
+            "assets_atlas": result("loads/s", 1, timings["load atlas"] + timings["atlas masks"])}
+
+BENCHMARKS = ("move", "collide", "activate", "generation", "parallel", "render", "assets")
+
+def run(only=BENCHMARKS, frames=500, checks=20000, repeat=3, seed=0):
+    results = {}
+    for name in only:
+        if name == "move":
+            results.update(bench_move(frames, repeat, seed))
+        elif name == "collide":
+            results.update(bench_collide(checks, repeat, seed))
+        elif name == "activate":
+            results.update(bench_activate(frames, repeat, seed))
+        elif name == "generation":
+            results.update(bench_generation(repeat, seed))
+        elif name == "parallel":
+            results.update(bench_parallel(repeat, seed))
+        elif name == "render":
+            results.update(bench_render(frames, repeat, seed))
+        elif name == "assets":
+            results.update(bench_assets(repeat))
+    return results
+
+# what the numbers were measured on
+def environment(args):
+    return {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine(),
+            "numpy": np.__version__, "pygame": pygame.version.ver, "neat": getattr(neat, "__version__", None),
+            "seed": args.seed, "repeat": args.repeat, "frames": args.frames, "checks": args.checks,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+# prints new / old for every benchmark both runs have - returns the names that got slower than threshold allows
+def compare(old, new, threshold):
+    regressions = []
+    print("{0:<28} {1:>14} {2:>14} {3:>8}".format("benchmark", "before", "after", "ratio"))
+    for name, after in new.items():
+        before = old.get(name)
+        if before is None:
+            continue
+        ratio = after["value"] / before["value"]
+        flag = ""
+        if ratio < 1 - threshold:
+            regressions.append(name)
+            flag = "  slower"
+        print("{0:<28} {1:>14.1f} {2:>14.1f} {3:>7.2f}x{4}".format(name, before["value"], after["value"], ratio, flag))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flappy Bird benchmarks")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--frames", type=int, default=500, help="frames to simulate, activate or draw per measurement")
+    parser.add_argument("--checks", type=int, default=20000, help="collision checks per measurement")
+    parser.add_argument("--repeat", type=int, default=3, help="measurements per benchmark, the best one is kept")
+    parser.add_argument("--seed", type=int, default=0, help="seed of every benchmark's inputs")
+    parser.add_argument("--output", metavar="FILE", help="write the results to this JSON file")
+    parser.add_argument("--compare", metavar="FILE", help="compare with the results of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.1, help="with --compare, exit 1 when a rate drops by more than this fraction")
+    args = parser.parse_args()
+
+    results = run(args.only, args.frames, args.checks, args.repeat, args.seed)
+    for name, r in results.items():
+        print("{0:<28} {1:>14.1f} {2}".format(name, r["value"], r["unit"]))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(args), "results": results}, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)["results"]
+        print()
+        if compare(old, results, args.threshold):
+            sys.exit(1)
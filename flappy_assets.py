@@ -0,0 +1,204 @@
+import os, json, time
+import pygame
+
+import flappy_core
+from flappy_core import Mask
+from flappy_atlas import IMAGE_DIR, ATLAS_PATH, ATLAS_MAGIC, ATLAS_VERSION, ATLAS_HEADER, read_atlas_index, source_stamps, atlas_masks
+
+# images and fonts are loaded on first use - the game state in flappy_core never needs them,
+# only a renderer does (and collision checks need the masks)
+# the images come from the atlas, one file with every sprite the game draws already scaled and packed together
+# and their collision masks - it is built from images/ the first time it is missing or older than them
+# (flappy_atlas reads its index without pygame, this module decodes, builds and loads the images)
+ASSETS = None
+
+KEY = (255, 0, 255) # transparent pixels of the atlas - the colorkey of every sprite without partly transparent pixels
+
+def load_image(name):
+    return pygame.transform.scale2x(pygame.image.load(os.path.join(IMAGE_DIR, name)))
+
+# every sprite the game draws, decoded and scaled from images/ - what the atlas is built from
+def decode_images():
+    pipe = load_image("pipe-red.png")
+    return {"bird0": load_image("redbird-upflap.png"), "bird1": load_image("redbird-midflap.png"), "bird2": load_image("redbird-downflap.png"),
+            "pipe_bottom": pipe, "pipe_top": pygame.transform.flip(pipe, False, True), # flip(surface, xbool, ybool)
+            "base": load_image("base-edit.jpg"), "bg": load_image("background-night.png"), "start": load_image("message.png"),
+            "gameover": load_image("gameover.png"), "icon": pygame.image.load(os.path.join(IMAGE_DIR, "redbird-upflap.png"))}
+
+class Assets:
+    # every image and font drawn by the game - images is a dict of the sprites by name, see decode_images()
+    # modes says how each image is blitted once there is a window (see sprite_mode) - images decoded from images/
+    # have none and are blitted as they are
+    def __init__(self, images, modes=None):
+        pygame.font.init()
+        # setting up fonts
+        self.STAT_FONT = pygame.font.SysFont("comicsnas", 50)
+        self.OTHER_FONT = pygame.font.SysFont("comicsnas", 25)
+        self.modes = modes
+        self.converted = False
+        self.set_images(images)
+
+    def set_images(self, images):
+        self.images = images
+        self.BIRD_IMGS = [images["bird0"], images["bird1"], images["bird2"]]
+        self.PIPE_BOTTOM = images["pipe_bottom"]
+        self.PIPE_TOP = images["pipe_top"]
+        self.BASE_IMG = images["base"]
+        self.BG_IMG = images["bg"]
+        self.START_IMG = images["start"]
+        self.GAMEOVER_IMG = images["gameover"]
+        self.ICON = images["icon"]
+        check_sizes(self.BIRD_IMGS, self.PIPE_BOTTOM, self.BASE_IMG)
+
+    # converts every atlas image to the display's pixel format, so blits don't convert them again every frame
+    # needs the window - open_window calls it once the window is there
+    # sprites without partly transparent pixels get an RLE colorkey: SDL blits them as runs of solid pixels,
+    # faster than per-pixel alpha and faster than a plain copy of a converted surface
+    def convert(self):
+        if self.converted or self.modes is None or pygame.display.get_surface() is None:
+            return
+        images = {}
+        for name, image in self.images.items():
+            if self.modes[name] == "colorkey":
+                images[name] = image.convert()
+                images[name].set_colorkey(KEY, pygame.RLEACCEL)
+            else:
+                images[name] = image.convert_alpha()
+        self.set_images(images)
+        self.converted = True
+
+# the game's images and fonts, loaded the first time a renderer asks for them - from the atlas when it is up to date,
+# otherwise decoded from images/ (and the atlas built for next time)
+def load():
+    global ASSETS
+    if ASSETS is None:
+        images, modes = load_atlas()
+        if images is None:
+            images = decode_images()
+            try_build_atlas(images)
+        ASSETS = Assets(images, modes)
+        ASSETS.convert() # only once there is a window, otherwise open_window does it
+    return ASSETS
+
+# "colorkey" when every pixel of an atlas sprite is either solid or fully transparent and none is the KEY colour,
+# "alpha" when it needs per-pixel alpha
+def sprite_mode(sprite):
+    solid = pygame.mask.from_surface(sprite, 254)
+    visible = pygame.mask.from_surface(sprite, 0).count()
+    keyed = pygame.mask.from_threshold(sprite, KEY, (1, 1, 1, 255)).overlap_area(solid, (0, 0)) # solid pixels of the KEY colour
+    return "colorkey" if solid.count() == visible and keyed == 0 else "alpha"
+
+# packs images into one RGBA surface, tallest first, on shelves as wide as the widest image
+# returns the surface and the rect of every image in it
+def pack(images):
+    width = max(image.get_width() for image in images.values())
+    rects = {}
+    x = y = shelf = 0
+    for name in sorted(images, key=lambda name: -images[name].get_height()):
+        w, h = images[name].get_size()
+        if x + w > width:
+            x, y, shelf = 0, y + shelf, 0
+        rects[name] = (x, y, w, h)
+        x += w
+        shelf = max(shelf, h)
+    atlas = pygame.Surface((width, y + shelf), pygame.SRCALPHA, 32)
+    atlas.fill(KEY + (0,))
+    for name, (x, y, w, h) in rects.items():
+        atlas.blit(images[name], (x, y)) # pixels of the image's own colorkey are skipped, they stay KEY with alpha 0
+    return atlas, rects
+
+# writes the atlas of images (see decode_images) to path - the file is replaced in one step, so a game loading it
+# at the same time (e.g. another worker) sees the old file or the new one, never half of one
+def build_atlas(images, path=ATLAS_PATH):
+    check_sizes([images["bird0"], images["bird1"], images["bird2"]], images["pipe_bottom"], images["base"])
+    atlas, rects = pack(images)
+    masks = {"bird": [mask_of(images["bird{0}".format(i)]) for i in range(3)],
+             "pipe_top": [mask_of(images["pipe_top"])], "pipe_bottom": [mask_of(images["pipe_bottom"])]}
+    modes = dict((name, sprite_mode(atlas.subsurface(rect))) for name, rect in rects.items())
+    index = {"sources": source_stamps(), "size": atlas.get_size(), "sprites": rects, "modes": modes,
+             "masks": dict((name, [[m.width, ["{0:x}".format(row) for row in m.rows]] for m in ms]) for name, ms in masks.items())}
+    index = json.dumps(index).encode("utf-8")
+    tmp = "{0}.{1}.tmp".format(path, os.getpid())
+    with open(tmp, "wb") as f:
+        f.write(ATLAS_HEADER.pack(ATLAS_MAGIC, ATLAS_VERSION, len(index)))
+        f.write(index)
+        f.write(pygame.image.tobytes(atlas, "RGBA"))
+    os.replace(tmp, path)
+
+# building the atlas is only a speed-up - a read-only install decodes images/ every time instead
+def try_build_atlas(images):
+    try:
+        build_atlas(images)
+    except OSError:
+        pass
+
+# every sprite from the atlas as a subsurface of its one surface, and its mode - (None, None) when the atlas can't be used
+def load_atlas(path=ATLAS_PATH):
+    try:
+        with open(path, "rb") as f:
+            index = read_atlas_index(f)
+            if index is None:
+                return None, None
+            width, height = index["size"]
+            pixels = f.read(width * height * 4) # reading an exact size is one read, reading to the end isn't
+    except OSError:
+        return None, None
+    atlas = pygame.image.frombuffer(pixels, (width, height), "RGBA")
+    return dict((name, atlas.subsurface(rect)) for name, rect in index["sprites"].items()), index["modes"]
+
+# the game state's geometry is fixed in flappy_core - new images have to keep the same sizes
+def check_sizes(bird_imgs, pipe_img, base_img):
+    sizes = [("bird", img.get_size(), flappy_core.BIRD_SIZE) for img in bird_imgs]
+    sizes += [("pipe", pipe_img.get_size(), flappy_core.PIPE_SIZE), ("base", (base_img.get_width(),), (flappy_core.BASE_WIDTH,))]
+    for name, size, expected in sizes:
+        if tuple(size) != tuple(expected):
+            raise ValueError("{0} image is {1}, flappy_core expects {2}".format(name, size, expected))
+
+# collision mask of a surface as a flappy_core.Mask
+def mask_of(surface):
+    mask = pygame.mask.from_surface(surface)
+    width, height = mask.get_size()
+    rows = []
+    for y in range(height):
+        row = 0
+        for x in range(width):
+            if mask.get_at((x, y)):
+                row |= 1 << x
+        rows.append(row)
+    return Mask(width, rows)
+
+# collision masks for flappy_core.masks() - from the atlas' index when it is up to date (no image is decoded),
+# otherwise from the images they come from, no display needed
+def load_masks():
+    masks = atlas_masks()
+    if masks is not None:
+        return masks
+    images = decode_images()
+    try_build_atlas(images)
+    check_sizes([images["bird0"], images["bird1"], images["bird2"]], images["pipe_bottom"], images["base"])
+    return {"bird": [mask_of(images["bird{0}".format(i)]) for i in range(3)],
+            "pipe_top": mask_of(images["pipe_top"]), "pipe_bottom": mask_of(images["pipe_bottom"])}
+
+# times loading the images and masks from images/ and from the atlas (the atlas is rebuilt first)
+def measure(repeat=5):
+    images = decode_images()
+    build_atlas(images)
+    timings = {}
+    for name, fn in (("decode images", decode_images), ("load atlas", load_atlas),
+                     ("decode masks", lambda: [mask_of(image) for key, image in decode_images().items() if key.startswith(("bird", "pipe"))]),
+                     ("atlas masks", load_masks)):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = best
+    return timings
+
+# python flappy_assets.py builds the atlas and reports how long loading takes with and without it
+if __name__ == "__main__":
+    timings = measure()
+    print("Built {0} ({1:.1f} MB)".format(ATLAS_PATH, os.path.getsize(ATLAS_PATH) / 2 ** 20))
+    for name, seconds in timings.items():
+        print("{0:<14} {1:8.2f} ms".format(name, seconds * 1000))
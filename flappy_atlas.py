@@ -0,0 +1,50 @@
+import os, json, struct
+
+from flappy_core import Mask
+
+# the atlas file without pygame: its index says whether it is up to date and holds the collision masks, so the
+# display-free game state can collide with an up-to-date atlas without pygame - flappy_assets builds it and loads its pixels
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+ATLAS_PATH = os.path.join(IMAGE_DIR, "atlas.bin")
+
+# atlas file: header, JSON index (sources, sprite rects, masks), then the raw RGBA pixels of the atlas
+ATLAS_MAGIC = b"FBAT"
+ATLAS_VERSION = 1
+ATLAS_HEADER = struct.Struct("<4sBI") # magic, version, index bytes
+# files the sprites come from - images/ has more that the game never draws, they stay out of the atlas
+SOURCES = ("redbird-upflap.png", "redbird-midflap.png", "redbird-downflap.png", "pipe-red.png",
+           "base-edit.jpg", "background-night.png", "message.png", "gameover.png")
+
+# size and modification time of every source file - an atlas built from other files is out of date
+def source_stamps():
+    stamps = {}
+    for name in SOURCES:
+        stat = os.stat(os.path.join(IMAGE_DIR, name))
+        stamps[name] = [stat.st_size, stat.st_mtime_ns]
+    return stamps
+
+# the atlas' index, read from the start of f - None when it is no atlas or it is out of date
+# the pixels follow right after it
+def read_atlas_index(f):
+    header = f.read(ATLAS_HEADER.size)
+    if len(header) < ATLAS_HEADER.size:
+        return None
+    magic, version, length = ATLAS_HEADER.unpack(header)
+    if magic != ATLAS_MAGIC or version != ATLAS_VERSION:
+        return None
+    index = json.loads(f.read(length).decode("utf-8"))
+    if index["sources"] != source_stamps():
+        return None
+    return index
+
+# collision masks for flappy_core.masks() from the atlas' index, None when there is no up-to-date atlas
+def atlas_masks(path=ATLAS_PATH):
+    try:
+        with open(path, "rb") as f:
+            index = read_atlas_index(f)
+    except OSError:
+        return None
+    if index is None:
+        return None
+    masks = dict((name, [Mask(width, [int(row, 16) for row in rows]) for width, rows in ms]) for name, ms in index["masks"].items())
+    return {"bird": masks["bird"], "pipe_top": masks["pipe_top"][0], "pipe_bottom": masks["pipe_bottom"][0]}
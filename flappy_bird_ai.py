@@ -1,342 +1,490 @@
-import pygame, neat, os, random
-
-pygame.font.init()
-pygame.display.set_caption("God Mode - Flappy Bird")
-icon = pygame.image.load("images/redbird-upflap.png")
-pygame.display.set_icon(icon)
+import pygame, neat, os, random, sys, argparse, multiprocessing, pickle, copy, time, configparser, bisect
+import numpy as np
+
+import flappy_assets
+from flappy_nn import BatchNetwork
+from flappy_population import Episode, FitnessStats, Budget, Courses
+from flappy_sensors import Sensors
+from flappy_render import DirtyRenderer, open_window, draw_window
+from flappy_replay import Replay, ReplayRecorder
+from flappy_loop import FixedTimestep, Interpolator, FPS
+from flappy_profile import Profiler, ProfileLog
+from flappy_policy import export
+from flappy_telemetry import Telemetry
+
+# headless training mode: no window, no frame cap (python flappy_bird_ai.py --headless or FLAPPY_HEADLESS=1)
+HEADLESS = "--headless" in sys.argv or os.environ.get("FLAPPY_HEADLESS", "0") not in ("", "0")
+if HEADLESS:
+    os.environ["SDL_VIDEODRIVER"] = "dummy" # SDL's dummy driver never opens a window
 
 # setting up variables
-WIN_WIDTH = 500
-WIN_HEIGHT = 800
 GEN = 0
-BIRD_IMGS = [pygame.transform.scale2x(pygame.image.load(os.path.join("images","redbird-upflap.png"))),
-            pygame.transform.scale2x(pygame.image.load(os.path.join("images","redbird-midflap.png"))),
-            pygame.transform.scale2x(pygame.image.load(os.path.join("images","redbird-downflap.png")))
-            ]
-PIPE_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join("images","pipe-red.png")))
-BASE_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join("images","base-edit.jpg")))
-BG_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join("images","background-night.png")))
-
-# setting up fonts
-STAT_FONT = pygame.font.SysFont("comicsnas", 50)
-OTHER_FONT = pygame.font.SysFont("comicsnas", 25)
-
-
-class Bird:
-    IMGS = BIRD_IMGS # img list object
-    MAX_ROTATION = 25 # for tilting the bird +25 or -25 degree
-    ROT_VEL = 20 # number times to rotate the image per frame every time we move bird
-    ANIMATION_TIME = 5 # control flappy bird's flapping (image shuffle) 
-
-    def __init__(self, x, y):
-        self.x = x # x coordinate bird
-        self.y = y # y coordinate bird
-        self.tilt = 0 # initializing bird's tilting (will start with no tilt)
-        self.tick_count = 0 # tracks jumps while bird moves in frame
-        self.vel = 0 # initializing velocity
-        self.height = self.y # setting height corresponding to y-coord
-        self.img_count = 0 # initilizing image count (tracks image for shuffling)
-        self.img = self.IMGS[0] # starting with first image of bird
-
-    # will flap-up the bird
-    def jump(self):
-        self.vel = -10.5 # for flapping bird upwards
-        self.tick_count = 0 # resetting jump counter to 0 for frame
-        self.height = self.y # after jump it'll update the height of bird (assigns y-coord)
-
-    # invoked in every single frame to move our bird
-    def move(self):
-        self.tick_count += 1 # records the numbr of times we moved bird since the last jump
-
-        # sets displacement (tells how much we are moving up or moving down)
-        # e.g: -10.5 * 1 + 1.5 * (1) ** 2 
-        # = -10.5 + 1.5 
-        # = -9
-        # similarly, ... -7, -5, -3, -1
-        d = self.vel * self.tick_count + 1.5*self.tick_count ** 2 
-
-        if d >= 16: # terminal velocity
-            d = 16
-
-        if d < 0: # move up little bit
-            d -= 2
-
-        self.y += d # updates y-coord smoothly (whether it's upward or downward)
-
-        # tilting the bird based on it's jump. (tilt down if it falls and vice-versa)
-        if d < 0 or self.y < self.height + 50:
-            if self.tilt < self.MAX_ROTATION:
-                self.tilt = self.MAX_ROTATION
-        else:
-            if self.tilt > -90:
-                self.tilt -= self.ROT_VEL
-
-    def draw(self, win):
-        self.img_count += 1 
-
-        # displaying imgage based on image counter
-        if self.img_count < self.ANIMATION_TIME:
-            self.img = self.IMGS[0] # wings-down
-        elif self.img_count < self.ANIMATION_TIME*2:
-            self.img = self.IMGS[1] # leveled-wings
-        elif self.img_count < self.ANIMATION_TIME*3:
-            self.img = self.IMGS[2] # wings-up
-        elif self.img_count < self.ANIMATION_TIME*4:
-            self.img = self.IMGS[1] # leveled-wings
-        elif self.img_count < self.ANIMATION_TIME*4 + 1:
-            self.img = self.IMGS[0] # wings-down
-            self.img_count = 0 # image counter reset
-
-        # to avoid flapping of wings while falling
-        if self.tilt <= -80:
-            self.img = self.IMGS[1] # as it'll be falling so, displaying bird image with leveled-wings
-            self.img_count = self.ANIMATION_TIME*2 
-
-        # rotating image
-        rotated_image = pygame.transform.rotate(self.img, self.tilt)
-        new_rect = rotated_image.get_rect(center=self.img.get_rect(topleft = (self.x, self.y)).center)
-
-        # rendering to the window
-        win.blit(rotated_image, new_rect.topleft) # win.blit(source, destination)
-
-    # helpful for getting mask of bird
-    def get_mask(self):
-        return pygame.mask.from_surface(self.img)
-
-class Pipe:
-    GAP = 200
-    VEL = 5
-
-    def __init__(self, x):
-        # initializing pipe variable
-        self.x = x
-        self.height = 0
-
-        self.top = 0
-        self.bottom = 0
-        # top pipe should be flipped first before rendering to window.
-        # transform module of pygame helps you to do such operations on surface
-        self.PIPE_TOP = pygame.transform.flip(PIPE_IMG, False, True) # flip(surface, xbool, ybool)
-        self.PIPE_BOTTOM = PIPE_IMG
-
-        self.passed = False # bird passed the pipe or not
-        self.set_height() # invoking randomized set_height() function
-
-    # creates random height of top & bottom pipes
-    def set_height(self):
-        self.height = random.randrange(50, 450) # randrange(start, stop, step) - [start, stop]
-        self.top = self.height - self.PIPE_TOP.get_height()
-        self.bottom = self.height + self.GAP
-
-    # moves pipe
-    def move(self):
-        self.x -= self.VEL
-
-    # draws top & bottom pipe
-    def draw(self, win):
-        win.blit(self.PIPE_TOP, (self.x, self.top))
-        win.blit(self.PIPE_BOTTOM, (self.x, self.bottom))
-        # pygame.draw.line(win, (0,0,255), (self.x, 0), (int(self.PIPE_TOP), self.bottom))
-        # pygame.display.flip()
-
-    # check for pixel perfect collision - bool function
-    def collide(self, bird):
-        bird_mask = bird.get_mask() # gets bird's mask
-        top_mask = pygame.mask.from_surface(self.PIPE_TOP) # gets top pipes mask
-        bottom_mask = pygame.mask.from_surface(self.PIPE_BOTTOM) # gets bottom pipes mask
-
-        # setting up the offset
-        top_offset = (self.x - bird.x, self.top - round(bird.y))
-        bottom_offset = (self.x - bird.x, self.bottom - round(bird.y))
-
-        # collision check variable
-        t_point = bird_mask.overlap(top_mask, top_offset)
-        b_point = bird_mask.overlap(bottom_mask, bottom_offset)
-
-        # collision check logic
-        if t_point or b_point:
-            return True
-        return False
-
-class Base:
-    VEL = 5
-    WIDTH = BASE_IMG.get_width()
-    # print(WIDTH)
-    IMG = BASE_IMG
-
-    def __init__(self, y):
-        self.y = y
-        self.x1 = 0
-        self.x2 = self.WIDTH
-
-    # will move pipe element
-    def move(self):
-        self.x1 -=self.VEL
-        self.x2 -= self.VEL
-
-        # logic that checks if any image is completely of the window - updating x1 & x2
-        if self.x1 + self.WIDTH < 0:
-            self.x1 = self.x2 + self.WIDTH
-
-        if self.x2 + self.WIDTH < 0:
-            self.x2 = self.x1 + self.WIDTH
-
-    # will loop pipe images in continuous manner
-    def draw(self, win):
-        # renders two images of pipe at x1 & x2 coords
-        win.blit(self.IMG, (self.x1, self.y))
-        win.blit(self.IMG, (self.x2, self.y))
-
-# will render all the elements as a whole
-def draw_window(win, birds, pipes, base, score, gen, alive, avgfitness, bestfitness):
-    win.blit(BG_IMG, (0,0))
-    for pipe in pipes:
-        pipe.draw(win)
-        # pygame.draw.line(win, (0,0,255), (0,0), (pipe.x+(pipe.PIPE_TOP.get_width())/2, pipe.height))
-        # pygame.draw.line(win, (0,0,255), (0,0), (pipe.x+(pipe.PIPE_BOTTOM.get_width())/2, pipe.height+pipe.GAP))
-
-
-    text = STAT_FONT.render("Score: " + str(score), 1, (255,255,255)) # 1 is for anti-aliasing (255,255,255) is the colour
-    win.blit(text, (WIN_WIDTH - 10 - text.get_width(), 10))
-
-    text = STAT_FONT.render("Gen: " + str(gen), 1, (255,255,255)) # 1 is for anti-aliasing (255,255,255) is the colour
-    win.blit(text, (10, 50))
-
-    text = STAT_FONT.render("Alive: " + str(alive), 1, (255,255,255)) # 1 is for anti-aliasing (255,255,255) is the colour
-    win.blit(text, (10, 10))
-    
-    text = OTHER_FONT.render("Avg Fitness: " + str(avgfitness), 1, (255,255,255)) # 1 is for anti-aliasing (255,255,255) is the colour
-    win.blit(text, (10, 90))
-    
-    text = OTHER_FONT.render("Best Fitness: " + str(bestfitness), 1, (255,255,255)) # 1 is for anti-aliasing (255,255,255) is the colour
-    win.blit(text, (10, 110))
-
-    base.draw(win)
-
-    for bird in birds:
-        bird.draw(win)
-        pygame.draw.line(win, (0, 100, 0), (bird.x+30, bird.y+30), (pipe.x+(pipe.PIPE_TOP.get_width())/2, pipe.height), 3)
-        pygame.draw.line(win, (0, 100, 0), (bird.x+30, bird.y+30), (pipe.x+(pipe.PIPE_BOTTOM.get_width())/2, pipe.height+pipe.GAP), 3)
-    pygame.display.update()
+STATS = FitnessStats() # fitness statistics of the last generation played
+REPLAY_DIR = None # when set, main() saves a replay of every generation there
+PROFILE = None # a ProfileLog when profiling is on - every generation adds its phase timings to it
+TELEMETRY = None # a flappy_telemetry.Telemetry when run() writes telemetry - games of main() report their frames to it
+
+class StopTraining(Exception):
+    # ESC in the God Mode window - leaves the training (or champion playback) and goes back to the menu
+    pass
 
 def main(genomes, config): # fitness function need 2 arguments - genomes and config file object
     # bird = Bird(230, 350)
     global GEN
     GEN += 1
-    nets = []
-    ge = []
-    birds = []
-
-    for _, g in genomes:
-        net = neat.nn.FeedForwardNetwork.create(g, config)
-        nets.append(net)
-        birds.append(Bird(230, 350))
-        g.fitness = 0
-        ge.append(g)
-    # create base object
-    base = Base(730)
-    # create pipes list
-    pipes = [Pipe(600)]
-    win = pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT)) # setting up pygame window object
+    win = None
+    if not HEADLESS:
+        win = open_window("God Mode - Flappy Bird")
+    seed = random.randrange(2 ** 32) # pipe sequence of this generation
+    recorder = None
+    if REPLAY_DIR:
+        recorder = ReplayRecorder(seed, len(genomes))
+    profiler = Profiler() if PROFILE is not None else None
+    global STATS
+    STATS = play(genomes, config, win, seed, recorder, profiler, budget_of(config), courses_of(config), TELEMETRY)
+    if recorder is not None:
+        recorder.save(os.path.join(REPLAY_DIR, "gen-{0}.replay".format(GEN)))
+    if profiler is not None:
+        report_profile(profiler)
+
+# adds a generation's profile to PROFILE and prints its summary
+def report_profile(profiler):
+    row = PROFILE.add(GEN, profiler)
+    print("Profile: {0} frames, {1:.0f} birds/s, {2}".format(row["frames"], row["birds_per_second"],
+            ", ".join("{0} {1:.3f} ms".format(phase, profiler.per_frame(phase)) for phase in profiler.seconds)))
+
+# draws an Episode alpha of the way from interpolator's positions to the current ones
+# overlay is a list of text lines for draw_window
+# with several courses only the first one is shown, the others are played alongside it - alive counts the birds
+# shown, the fitness is that of every bird on every course, and the overlay says so
+def draw_episode(screen, episode, gen, interpolator=None, alpha=1.0, overlay=()):
+    after = interpolator.apply(alpha) if interpolator is not None else []
+    birds, pipes = episode.course_view(0)
+    if episode.courses > 1:
+        overlay = ["Course 1 of {0} shown".format(episode.courses), "Fitness per course"] + list(overlay)
+    draw_window(screen, birds, pipes, episode.base, episode.score, gen, np.count_nonzero(birds.alive), round(episode.stats.mean, 2), round(episode.stats.best, 2), overlay)
+    if after:
+        interpolator.restore(after)
+
+# F cycles the fast-forward speed - shown in the window's caption
+def cycle_speed(timestep, caption):
+    speed = timestep.cycle_speed()
+    pygame.display.set_caption("{0} ({1}x)".format(caption, speed) if speed > 1 else caption)
+
+# plays one generation (or one batch of it), sets fitness of every genome - draws only when a window is given
+# seed picks the pipe sequence, recorder (a ReplayRecorder) gets the flaps of every frame
+# profiler (a Profiler) times every phase of every frame and is shown on screen
+# budget (a Budget) can stop the game before every bird is dead, without one it runs until they are
+# courses (a Courses) plays every genome on several pipe courses at once and sets the aggregate of its fitness,
+# the recorder only gets the first course - the one with the pipes of seed
+# telemetry (a Telemetry) gets the number of birds alive, the score and the fitness every few frames
+# returns the FitnessStats of the genomes it played - streamed while playing one course, of the aggregate fitness
+# with several, where the streamed ones are of single courses
+def play(genomes, config, win=None, seed=None, recorder=None, profiler=None, budget=None, courses=None, telemetry=None):
+    ge = [g for _, g in genomes]
+    courses = courses or Courses()
+    nets = BatchNetwork.create(ge, config) # every bird's network, evaluated together
+    if courses.count > 1:
+        nets.keep_rows(np.tile(np.arange(len(ge)), courses.count)) # a copy of every net for each course
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    episode = Episode(len(ge), seed, budget, courses.count) # row k * n + x of the birds is ge[x] on course k, so is that row of nets
+    episode.profiler = profiler
+    episode.on_cull = nets.keep_rows # networks stay row for row with the birds
+    episode.same_policy = nets.rows_identical
+    sensors = Sensors(config.genome_config.num_inputs, len(episode.birds)) # the input buffer, reused every frame
     clock = pygame.time.Clock()
-    score = 0
-    alive = 100
-    fit = list()
-    avgfitness = 0
-    bestfitness = 0
-
-    run = True
-    while run:
-        clock.tick(30) # 30 tick every seconds so frame doesn't move fast.
+    screen = DirtyRenderer(win, flappy_assets.load().BG_IMG) if win is not None else None
+    timestep = FixedTimestep() # physics runs at a fixed rate however fast frames are drawn
+    interpolator = Interpolator()
+
+    # every bird's network looks at the pipe ahead - its height and its distance to the gap's top and bottom,
+    # or the normalized sensors of flappy_sensors when the config asks for more inputs
+    def decide(episode, pipe):
+        return nets.activate(sensors.read(episode, pipe))[:, 0] > 0.5
+
+    # telemetry sees every tick, however many of them a drawn frame takes
+    observe = None
+    if telemetry is not None:
+        observe = lambda episode: telemetry.frame(GEN, episode)
+
+    while not episode.over:
+        if win is None: # headless - no frames, just ticks as fast as they run
+            flap = episode.step(decide)
+            if recorder is not None:
+                recorder.record(flap)
+            if observe is not None:
+                observe(episode)
+            continue
+
+        ticks = timestep.advance(clock.tick(FPS) / 1000) # ticks owed for the time the last frame took
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
-                run = False
                 pygame.quit()
                 quit()
-
-        pipe_ind = 0
-        if len(birds) > 0:
-            if len(pipes) > 1 and  birds[0].x > pipes[0].x + pipes[0].PIPE_TOP.get_width():
-                pipe_ind = 1
-        else: # no birds left so quit the game
-            run = False
-            break
-        
-        for x, bird in enumerate(birds):
-            bird.move()
-            ge[x].fitness += 0.1
-            fit.insert(x, ge[x].fitness)
-
-            output = nets[x].activate((bird.y, abs(bird.y - pipes[pipe_ind].height), abs(bird.y - pipes[pipe_ind].bottom)))
-
-            if output[0] > 0.5:
-                bird.jump()
-
-        add_pipe = False
-        rem = []
-        # loops for each pipe in pipes list
-        for pipe in pipes:
-            for x, bird in enumerate(birds):
-                # collision check
-                if pipe.collide(bird):
-                    # print("hi")
-                    ge[x].fitness -= 1
-                    fit.insert(x, ge[x].fitness)
-                    birds.pop(x)
-                    nets.pop(x)
-                    ge.pop(x)
-                    alive -= 1
-
-                # checks whether bird has passed the pipe or not ?
-                if not pipe.passed and pipe.x < bird.x:
-                    pipe.passed = True
-                    add_pipe = True
-            
-            if pipe.x + pipe.PIPE_TOP.get_width() < 0: # whether pipe is completely off the screen or not ?
-                rem.append(pipe) # add it to rem list
-            avgfitness = round(sum(fit)/len(fit), 2)
-            bestfitness = round(max(fit), 2)
-            pipe.move() # moves pipe 
-
-        # will append new pipe in pipes list
-        if add_pipe:
-            score += 1
-            for g in ge:
-                g.fitness += 5
-            pipes.append(Pipe(600))
-
-        # removes pipes which are off the screen
-        for r in rem:
-            pipes.remove(r)
-
-        for x, bird in enumerate(birds):
-            # check whether bird hits the floor or shoots into the sky
-            if bird.y + bird.img.get_height() >= 730 or bird.y < 0:
-                birds.pop(x)
-                nets.pop(x)
-                ge.pop(x)
-                alive -= 1
-
-        base.move()
-        draw_window(win, birds, pipes, base, score, GEN, alive, avgfitness, bestfitness)
-
-def run(config_path):
-    # import pickle
+            elif event.type == pygame.VIDEOEXPOSE: # window was uncovered, redraw all of it
+                screen.invalidate()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_f:
+                cycle_speed(timestep, "God Mode - Flappy Bird")
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                raise StopTraining()
+
+        episode.advance(decide, ticks, interpolator, recorder, observe)
+        if profiler is None:
+            draw_episode(screen, episode, GEN, interpolator, timestep.alpha)
+        else:
+            t = time.perf_counter()
+            draw_episode(screen, episode, GEN, interpolator, timestep.alpha, profiler.overlay())
+            profiler.lap("draw", t)
+
+    fitnesses = courses.fitness(episode.birds.all_fitness()).tolist()
+    for g, fitness in zip(ge, fitnesses):
+        g.fitness = fitness
+    stats = episode.stats
+    if courses.count > 1:
+        stats = FitnessStats(len(ge))
+        stats.add(sum(fitnesses))
+        stats.observe(max(fitnesses, default=0.0))
+    if episode.stop_reason is not None:
+        print("Evaluation stopped at frame {0} ({1}), {2} birds still alive".format(episode.frames, episode.stop_reason, np.count_nonzero(episode.birds.alive)))
+    if profiler is not None:
+        profiler.stop()
+    return stats
+
+class Seeker:
+    # jumps to any frame of a replay - that's how the replay player scrubs
+    # a copy of the Episode is kept every EVERY frames, made the first time playback or a seek passes there,
+    # so a seek only replays the frames after the closest copy before it instead of the whole game
+    EVERY = 300
+
+    def __init__(self, replay):
+        self.replay = replay
+        self.frames = [0] # frames of the snapshots, in order
+        self.snapshots = [Episode(replay.birds, replay.seed)]
+
+    # the flaps of the recording, as a decide function for Episode.step
+    def decide(self, episode, pipe):
+        return self.replay.flaps(episode.frames)[episode.birds.index]
+
+    # whether episode reached the end of the recording - a game stopped by its budget ends with birds still alive,
+    # playing on without the recorded flaps would show a game that never happened
+    def ended(self, episode):
+        return episode.over or episode.frames >= self.replay.frames
+
+    # a new Episode at the given frame (or where the game ended, if that is earlier)
+    def seek(self, frame):
+        i = bisect.bisect_right(self.frames, frame) - 1
+        episode = copy.deepcopy(self.snapshots[i])
+        while episode.frames < frame and not self.ended(episode):
+            episode.step(self.decide)
+            self.keep(episode)
+        return episode
+
+    # keeps a copy of episode when it is EVERY frames past the last snapshot before it
+    def keep(self, episode):
+        i = bisect.bisect_right(self.frames, episode.frames) - 1
+        if episode.frames >= self.frames[i] + self.EVERY:
+            self.frames.insert(i + 1, episode.frames)
+            self.snapshots.insert(i + 1, copy.deepcopy(episode))
+
+# plays back a replay file: SPACE pauses, LEFT/RIGHT scrub 5 seconds back/forward, F fast-forwards
+def watch_replay(path):
+    replay = Replay.load(path)
+    win = open_window("Replay - Flappy Bird")
+    screen = DirtyRenderer(win, flappy_assets.load().BG_IMG)
+    clock = pygame.time.Clock()
+    timestep = FixedTimestep()
+    interpolator = Interpolator()
+    seeker = Seeker(replay)
+    episode = seeker.seek(0)
+    paused = False
+    while True:
+        ticks = timestep.advance(clock.tick(FPS) / 1000)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                return
+            elif event.type == pygame.VIDEOEXPOSE:
+                screen.invalidate()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                paused = not paused
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_f:
+                cycle_speed(timestep, "Replay - Flappy Bird")
+            elif event.type == pygame.KEYDOWN and event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                step = 150 if event.key == pygame.K_RIGHT else -150
+                episode = seeker.seek(max(0, episode.frames + step))
+                interpolator = Interpolator() # nothing to draw in between after a jump
+                screen.invalidate()
+        if not paused and not seeker.ended(episode):
+            episode.advance(seeker.decide, min(ticks, replay.frames - episode.frames), interpolator)
+            seeker.keep(episode)
+        still = paused or seeker.ended(episode) # nothing moves, so nothing to draw in between
+        draw_episode(screen, episode, GEN, interpolator, 1.0 if still else timestep.alpha)
+
+# worker side of ParallelEvaluator - plays one batch headless on the generation's pipe sequence
+# returns the fitness of each genome, the batch's FitnessStats, its flaps (frames, birds) when record is set
+# and its Profiler when profile is set
+def eval_batch(genomes, config, seed, record=False, profile=False):
+    recorder = ReplayRecorder(seed, len(genomes)) if record else None
+    profiler = Profiler() if profile else None
+    # identical survivors only tie within a batch - another batch's survivors could outlive them
+    budget = copy.copy(budget_of(config))
+    budget.stop_identical = False
+    stats = play(genomes, config, seed=seed, recorder=recorder, profiler=profiler, budget=budget, courses=courses_of(config))
+    jumps = recorder.replay().jumps if record else None
+    return [g.fitness for _, g in genomes], stats, jumps, profiler
+
+class ParallelEvaluator:
+    # fitness function in the style of neat.ParallelEvaluator, but every worker plays a whole batch of birds
+    # and all batches of a generation share the seeded pipe courses so their fitness stays comparable
+    # it gains little: a frame costs about the same for a few birds as for the whole flock (the pipes, the sensors and
+    # every network layer are one numpy call each, however many rows) and the batch with the best bird plays as many
+    # frames as the whole generation would - benchmark.py --only parallel measures about 1.2x with 8 workers
+    # giving workers whole courses instead is no better, w workers on k courses pay k / w games' fixed costs each
+    def __init__(self, num_workers, replay_dir=None):
+        self.num_workers = num_workers
+        self.replay_dir = replay_dir # when set, a replay of every generation is saved there, like main() does
+        self.pool = multiprocessing.Pool(num_workers)
+
+    def __del__(self):
+        self.pool.close()
+        self.pool.join()
+
+    def evaluate(self, genomes, config):
+        global GEN, STATS
+        GEN += 1
+        seed = random.randrange(2 ** 32) # same pipes for every batch of this generation
+        # one batch per worker, dealt out round-robin so every batch gets a similar mix of genomes
+        batches = [genomes[i::self.num_workers] for i in range(self.num_workers)]
+        batches = [batch for batch in batches if batch]
+        record = self.replay_dir is not None
+        profile = PROFILE is not None
+        jobs = [self.pool.apply_async(eval_batch, (batch, config, seed, record, profile)) for batch in batches]
+
+        # assign the fitness back to each genome
+        stats = FitnessStats()
+        profiler = Profiler() if profile else None
+        results = []
+        for job, batch in zip(jobs, batches):
+            fitnesses, batch_stats, jumps, batch_profiler = job.get()
+            for (_, g), fitness in zip(batch, fitnesses):
+                g.fitness = fitness
+            stats.merge(batch_stats)
+            if profile:
+                profiler.merge(batch_profiler) # phase times add up over the workers, wall time doesn't
+            results.append(jumps)
+        STATS = stats
+        if profile:
+            report_profile(profiler)
+
+        if record:
+            # birds don't interact and the pipes are the same, so the batches join into one replay of the generation
+            # (a batch stops recording when its last bird dies, nobody in it flaps after that)
+            jumps = np.zeros((max(len(j) for j in results), len(genomes)), dtype=bool)
+            for i, batch_jumps in enumerate(results):
+                jumps[:len(batch_jumps), i::self.num_workers] = batch_jumps
+            Replay(seed, jumps).save(os.path.join(self.replay_dir, "gen-{0}.replay".format(GEN)))
+
+class FitnessStatsReporter(neat.reporting.BaseReporter):
+    # reports the streamed fitness statistics (STATS) of every generation and keeps them in history
+    # - the genomes' fitness, aggregated over the courses when there are several
+    def __init__(self):
+        self.history = [] # (avg fitness, best fitness) per generation
+
+    def post_evaluate(self, config, population, species, best_genome):
+        self.history.append((STATS.mean, STATS.best))
+        print("Streamed fitness: avg {0:.2f}, best {1:.2f}".format(STATS.mean, STATS.best))
+
+class TelemetryReporter(neat.reporting.BaseReporter):
+    # sends every generation's statistics to a Telemetry - evaluation throughput is genomes evaluated per second
+    def __init__(self, telemetry):
+        self.telemetry = telemetry
+        self.started = time.perf_counter()
+
+    def start_generation(self, generation):
+        self.started = time.perf_counter()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        seconds = time.perf_counter() - self.started
+        fitnesses = [g.fitness for g in population.values()]
+        self.telemetry.emit("generation", (GEN, best_genome.fitness, sum(fitnesses) / len(fitnesses), len(species.species),
+                len(fitnesses), STATS.best, STATS.mean, round(seconds, 6), len(fitnesses) / seconds if seconds else 0.0))
+        self.telemetry.flush() # a generation's record goes out without waiting for the batch to fill
+
+# neat's config plus config.budget and config.courses, the evaluation settings from the file's [Evaluation] section
+def load_config(config_path):
     config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
             neat.DefaultSpeciesSet, neat.DefaultStagnation, config_path)
-
-    p = neat.Population(config)
+    config.budget = load_budget(config_path, config)
+    config.courses = load_courses(config_path)
+    return config
+
+# [Evaluation] max_frames, max_score, stop_at_threshold, stop_identical - every key is optional
+# neat ignores sections it doesn't know, so the budget lives in the same file
+def load_budget(config_path, config):
+    parser = configparser.ConfigParser()
+    parser.read(config_path)
+    section = parser["Evaluation"] if parser.has_section("Evaluation") else {}
+    threshold = None
+    # the threshold only ends a run with the max criterion, otherwise stopping at it would cut evaluations short for nothing
+    stop_at_threshold = parser.getboolean("Evaluation", "stop_at_threshold", fallback=False)
+    if stop_at_threshold and config.fitness_criterion == "max" and not config.no_fitness_termination:
+        threshold = config.fitness_threshold
+    return Budget(int(section.get("max_frames", 0)), int(section.get("max_score", 0)), threshold,
+            parser.getboolean("Evaluation", "stop_identical", fallback=False))
+
+# budget of an evaluation with this config - configs of old checkpoints have none, they run unlimited
+def budget_of(config):
+    return getattr(config, "budget", None) or Budget()
+
+# [Evaluation] courses, aggregate (mean, min or quantile) and quantile - one course with its own fitness by default
+def load_courses(config_path):
+    parser = configparser.ConfigParser()
+    parser.read(config_path)
+    return Courses(parser.getint("Evaluation", "courses", fallback=1), parser.get("Evaluation", "aggregate", fallback="mean"),
+            parser.getfloat("Evaluation", "quantile", fallback=0.25))
+
+# pipe courses of an evaluation with this config - configs of old checkpoints fly one
+def courses_of(config):
+    return getattr(config, "courses", None) or Courses()
+
+# trains for the given number of generations and saves the winner genome to winner_path (and as a policy to policy_path)
+# checkpoints (population, species and random state) are written every checkpoint_every generations and every 5 minutes,
+# resume continues from such a checkpoint instead of starting a new population
+# replay_dir gets a replay of every generation (gen-<n>.replay) and one of the winner playing alone (winner.replay)
+# profile turns on the per-phase profiler - True only prints it, a file name also exports it (.json or CSV)
+# telemetry is a JSONL file every generation (and every telemetry_every-th frame of games played in this process)
+# is appended to by a background thread, see flappy_telemetry
+def run(config_path, generations=50, workers=0, resume=None, checkpoint_every=5, checkpoint_prefix="neat-checkpoint-", winner_path="winner.pkl", replay_dir=None, profile=None, max_frames=None, max_score=None, courses=None, aggregate=None, policy_path=None, telemetry=None, telemetry_every=10):
+    global GEN, REPLAY_DIR, PROFILE, TELEMETRY
+    GEN = 0
+    PROFILE = None
+    REPLAY_DIR = None
+    if profile:
+        PROFILE = ProfileLog(profile if isinstance(profile, str) else None)
+    if replay_dir:
+        os.makedirs(replay_dir, exist_ok=True)
+        REPLAY_DIR = replay_dir
+    if resume:
+        p = neat.Checkpointer.restore_checkpoint(resume) # carries its own config
+        GEN = p.generation + 1 # a checkpoint holds the population bred after its generation
+    else:
+        p = neat.Population(load_config(config_path))
+    # command line limits override the config's (and those a checkpoint was saved with)
+    if max_frames is not None or max_score is not None:
+        p.config.budget = copy.copy(budget_of(p.config))
+        if max_frames is not None:
+            p.config.budget.max_frames = max_frames
+        if max_score is not None:
+            p.config.budget.max_score = max_score
+    if courses is not None or aggregate is not None:
+        old = courses_of(p.config)
+        p.config.courses = Courses(old.count if courses is None else courses, aggregate or old.aggregate, old.quantile)
 
     p.add_reporter(neat.StdOutReporter(True)) # prints various information about each generation in console
     stats = neat.StatisticsReporter()
     p.add_reporter(stats)
-
-    winner = p.run(main, 50) # 50 here is generations (here main is fitness function it calls main function 50 times.)
-    return
+    p.add_reporter(FitnessStatsReporter())
+    if checkpoint_every > 0:
+        p.add_reporter(neat.Checkpointer(checkpoint_every, 300, checkpoint_prefix))
+
+    fitness_function = main
+    if workers > 0:
+        evaluator = ParallelEvaluator(workers, replay_dir) # workers fork before the telemetry thread starts
+        fitness_function = evaluator.evaluate
+
+    if telemetry:
+        TELEMETRY = Telemetry(telemetry, frame_every=telemetry_every)
+        p.add_reporter(TelemetryReporter(TELEMETRY))
+    try:
+        winner = p.run(fitness_function, generations) # generations is 50 by default (here main is fitness function it calls main function 50 times.)
+    finally:
+        if TELEMETRY is not None: # a crash or ESC still writes what was recorded
+            TELEMETRY.close()
+            TELEMETRY = None
+
+    if winner_path:
+        with open(winner_path, "wb") as f:
+            pickle.dump(winner, f)
+        print("Saved winner genome to {0}".format(winner_path))
+    if policy_path:
+        export(winner, p.config).save(policy_path)
+        print("Saved winner policy to {0}".format(policy_path))
+    if replay_dir:
+        path = os.path.join(replay_dir, "winner.replay")
+        record_replay(winner, p.config, path)
+        print("Saved winner replay to {0}".format(path))
+    return winner
+
+# budget of a genome flying alone, headless - a perfect bird would fly forever, so there is always a frame limit:
+# the config's, or SOLO_FRAMES when the config has none
+SOLO_FRAMES = 20000
+
+def solo_budget(config):
+    return Budget(budget_of(config).max_frames or SOLO_FRAMES)
+
+# plays a genome alone, headless, on a new pipe sequence and saves the game as a replay file
+# the genome keeps the fitness it got in training
+def record_replay(genome, config, path, seed=None):
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    genome = copy.deepcopy(genome)
+    recorder = ReplayRecorder(seed, 1)
+    play([(genome.key, genome)], config, seed=seed, recorder=recorder, budget=solo_budget(config))
+    recorder.save(path)
+    return genome.fitness
+
+# saves a saved genome as a standalone policy (flappy_policy) - .json or binary by the file name
+def export_policy(genome_path, config_path, policy_path):
+    with open(genome_path, "rb") as f:
+        genome = pickle.load(f)
+    policy = export(genome, load_config(config_path))
+    policy.save(policy_path)
+    print("Saved {0} nodes of {1} to {2}".format(len(policy.nodes), genome_path, policy_path))
+
+# plays a saved genome on its own, e.g. the winner of a training run
+def watch(genome_path, config_path):
+    with open(genome_path, "rb") as f:
+        genome = pickle.load(f)
+    # on screen the champion flies until it crashes (or ESC), headless only as long as the frame budget
+    config = load_config(config_path)
+    if HEADLESS:
+        play([(genome.key, genome)], config, budget=solo_budget(config))
+    else:
+        play([(genome.key, genome)], config, open_window("Champion - Flappy Bird"))
+    print("Fitness: {0:.2f}".format(genome.fitness))
 
 if __name__ == "__main__":
     local_dir = os.path.dirname(__file__)
-    config_path = os.path.join(local_dir,  "config-feedforward.txt")
-    run(config_path)
+    parser = argparse.ArgumentParser(description="God Mode - Flappy Bird")
+    parser.add_argument("--headless", action="store_true", help="train without a window and without the 30 FPS cap (same as FLAPPY_HEADLESS=1)")
+    parser.add_argument("--generations", type=int, default=50, help="number of generations to train")
+    parser.add_argument("--workers", type=int, default=0, help="evaluate genomes headless on this many processes (0 = play them in this process) - every process plays the whole game, so this gains little")
+    parser.add_argument("--config", default=os.path.join(local_dir,  "config-feedforward.txt"), help="path to the NEAT config file")
+    parser.add_argument("--resume", metavar="CHECKPOINT", help="continue training from a checkpoint file (--generations more generations)")
+    parser.add_argument("--checkpoint-every", type=int, default=5, help="save a checkpoint every this many generations (0 = never)")
+    parser.add_argument("--checkpoint-prefix", default="neat-checkpoint-", help="checkpoint file names are this prefix plus the generation")
+    parser.add_argument("--winner", default="winner.pkl", help="file the winner genome is saved to")
+    parser.add_argument("--policy", default="winner.policy", help="file the winner is saved to as a standalone policy (.json or binary), played by flappy_bird.py without neat")
+    parser.add_argument("--export", metavar="GENOME", help="save a saved genome (e.g. winner.pkl) to the --policy file instead of training")
+    parser.add_argument("--watch", metavar="GENOME", help="play a saved genome (e.g. winner.pkl) instead of training")
+    parser.add_argument("--replay-dir", help="save a replay of every generation and of the winner in this directory")
+    parser.add_argument("--replay", metavar="FILE", help="play back a replay file (SPACE pauses, LEFT/RIGHT scrub) instead of training")
+    parser.add_argument("--max-frames", type=int, help="end a generation after this many frames (0 = no limit, default from the config's [Evaluation] section)")
+    parser.add_argument("--max-score", type=int, help="end a generation once this many pipes are passed (0 = no limit, default from the config)")
+    parser.add_argument("--courses", type=int, help="pipe courses every genome flies per generation, its fitness aggregates them (default from the config)")
+    parser.add_argument("--aggregate", choices=Courses.AGGREGATES, help="how the fitness of several courses is combined (default from the config)")
+    parser.add_argument("--profile", nargs="?", const=True, metavar="FILE", help="time every phase of the game loop, show it on screen and export it per generation to FILE (.json or .csv)")
+    parser.add_argument("--telemetry", metavar="FILE", help="append generation and frame statistics to this JSONL file, written by a background thread")
+    parser.add_argument("--telemetry-every", type=int, default=10, metavar="N", help="a telemetry frame record every N frames of games played in this process (0 = generations only)")
+    args = parser.parse_args()
+    if args.replay:
+        watch_replay(args.replay)
+    elif args.export:
+        export_policy(args.export, args.config, args.policy)
+    elif args.watch:
+        watch(args.watch, args.config)
+    else:
+        run(args.config, args.generations, args.workers, args.resume, args.checkpoint_every, args.checkpoint_prefix, args.winner, args.replay_dir, args.profile, args.max_frames, args.max_score, args.courses, args.aggregate, args.policy, args.telemetry, args.telemetry_every)
     # win.blit(GAMEOVER_IMG, (63, 150))
-    pygame.display.update()
\ No newline at end of file
+    if not HEADLESS and pygame.display.get_surface() is not None: # --workers and --export never open a window
+        pygame.display.update()
\ No newline at end of file
@@ -0,0 +1,187 @@
+import random
+
+# display-free game state: physics, pipe spawning, scoring and collision geometry - no pygame, no images
+# sizes are those of the images in images/ scaled 2x, flappy_assets checks that they still match
+WIN_WIDTH = 500
+WIN_HEIGHT = 800
+FLOOR = 730 # y of the base, a bird touching it is dead
+BIRD_SIZE = (68, 48) # every frame of the bird animation has the same size
+PIPE_SIZE = (104, 640)
+BASE_WIDTH = 672
+
+MASKS = None # collision masks, loaded from the images the first time a collision is checked
+
+class Mask:
+    # solid pixels of an image - one int per row, bit x of a row is set when pixel x of that row is solid
+    def __init__(self, width, rows):
+        self.width = width
+        self.height = len(rows)
+        self.rows = rows
+
+    # same as pygame.mask.Mask.overlap: other's top-left is at offset from this mask's top-left
+    # returns whether any solid pixels of the two touch
+    def overlap(self, other, offset):
+        ox, oy = offset
+        for y in range(max(0, oy), min(self.height, oy + other.height)):
+            row = other.rows[y - oy]
+            if self.rows[y] & (row << ox if ox >= 0 else row >> -ox):
+                return True
+        return False
+
+# collision masks: {"bird": [mask of each animation frame], "pipe_top": mask, "pipe_bottom": mask}
+def masks():
+    global MASKS
+    if MASKS is None:
+        import flappy_atlas # an up-to-date atlas holds the masks, reading them needs no pygame
+        MASKS = flappy_atlas.atlas_masks()
+    if MASKS is None:
+        import flappy_assets # otherwise the first collision decodes the images (and builds the atlas)
+        MASKS = flappy_assets.load_masks()
+    return MASKS
+
+class Bird:
+    MAX_ROTATION = 25 # for tilting the bird +25 or -25 degree
+    ROT_VEL = 20 # number times to rotate the image per frame every time we move bird
+    ANIMATION_TIME = 5 # control flappy bird's flapping (image shuffle)
+
+    def __init__(self, x, y):
+        self.x = x # x coordinate bird
+        self.y = y # y coordinate bird
+        self.tilt = 0 # initializing bird's tilting (will start with no tilt)
+        self.tick_count = 0 # tracks jumps while bird moves in frame
+        self.vel = 0 # initializing velocity
+        self.height = self.y # setting height corresponding to y-coord
+        self.img_count = 0 # initilizing image count (tracks image for shuffling)
+        self.img = 0 # animation frame shown: 0 wings-down, 1 leveled-wings, 2 wings-up
+
+    # will flap-up the bird
+    def jump(self):
+        self.vel = -10.5 # for flapping bird upwards
+        self.tick_count = 0 # resetting jump counter to 0 for frame
+        self.height = self.y # after jump it'll update the height of bird (assigns y-coord)
+
+    # invoked in every single frame to move our bird
+    def move(self):
+        self.tick_count += 1 # records the numbr of times we moved bird since the last jump
+
+        # sets displacement (tells how much we are moving up or moving down)
+        # e.g: -10.5 * 1 + 1.5 * (1) ** 2
+        # = -10.5 + 1.5
+        # = -9
+        # similarly, ... -7, -5, -3, -1
+        d = self.vel * self.tick_count + 1.5*self.tick_count ** 2
+
+        if d >= 16: # terminal velocity
+            d = 16
+
+        if d < 0: # move up little bit
+            d -= 2
+
+        self.y += d # updates y-coord smoothly (whether it's upward or downward)
+
+        # tilting the bird based on it's jump. (tilt down if it falls and vice-versa)
+        if d < 0 or self.y < self.height + 50:
+            if self.tilt < self.MAX_ROTATION:
+                self.tilt = self.MAX_ROTATION
+        else:
+            if self.tilt > -90:
+                self.tilt -= self.ROT_VEL
+
+    # advances the flapping animation, once per tick - the shown frame is also the bird's collision mask
+    def animate(self):
+        self.img_count += 1
+
+        # displaying imgage based on image counter
+        if self.img_count < self.ANIMATION_TIME:
+            self.img = 0 # wings-down
+        elif self.img_count < self.ANIMATION_TIME*2:
+            self.img = 1 # leveled-wings
+        elif self.img_count < self.ANIMATION_TIME*3:
+            self.img = 2 # wings-up
+        elif self.img_count < self.ANIMATION_TIME*4:
+            self.img = 1 # leveled-wings
+        elif self.img_count < self.ANIMATION_TIME*4 + 1:
+            self.img = 0 # wings-down
+            self.img_count = 0 # image counter reset
+
+        # to avoid flapping of wings while falling
+        if self.tilt <= -80:
+            self.img = 1 # as it'll be falling so, displaying bird image with leveled-wings
+            self.img_count = self.ANIMATION_TIME*2
+
+    # bird hit the floor or shot into the sky
+    def out_of_bounds(self):
+        return self.y + BIRD_SIZE[1] >= FLOOR or self.y < 0
+
+    # helpful for getting mask of bird
+    def get_mask(self):
+        return masks()["bird"][self.img]
+
+class Pipe:
+    GAP = 200
+    VEL = 5
+    WIDTH, HEIGHT = PIPE_SIZE
+
+    __slots__ = ("x", "height", "top", "bottom", "passed", "rng")
+
+    def __init__(self, x, rng=random):
+        # initializing pipe variable
+        self.x = x
+        self.rng = rng # random source for pipe heights (a seeded random.Random gives a repeatable pipe sequence)
+        self.height = 0
+
+        self.top = 0
+        self.bottom = 0
+
+        self.passed = False # bird passed the pipe or not
+        self.set_height() # invoking randomized set_height() function
+
+    # creates random height of top & bottom pipes
+    def set_height(self):
+        self.height = self.rng.randrange(50, 450) # randrange(start, stop, step) - [start, stop]
+        self.top = self.height - self.HEIGHT
+        self.bottom = self.height + self.GAP
+
+    # moves pipe
+    def move(self):
+        self.x -= self.VEL
+
+    # check for pixel perfect collision - bool function
+    def collide(self, bird):
+        bird_w, bird_h = BIRD_SIZE
+        y = round(bird.y)
+
+        # cheap rejection - no pixel can touch unless the bird's box reaches the pipe's columns and leaves the gap
+        if bird.x + bird_w <= self.x or bird.x >= self.x + self.WIDTH:
+            return False
+        if y >= self.height and y + bird_h <= self.bottom:
+            return False
+
+        return self.collide_at(bird.get_mask(), bird.x, y)
+
+    # pixel test of a bird mask with its top-left at (x, y) against the top and bottom pipe
+    def collide_at(self, bird_mask, x, y):
+        pipe_masks = masks()
+        return bird_mask.overlap(pipe_masks["pipe_top"], (self.x - x, self.top - y)) or \
+                bird_mask.overlap(pipe_masks["pipe_bottom"], (self.x - x, self.bottom - y))
+
+class Base:
+    VEL = 5
+    WIDTH = BASE_WIDTH
+
+    def __init__(self, y):
+        self.y = y
+        self.x1 = 0
+        self.x2 = self.WIDTH
+
+    # will move pipe element
+    def move(self):
+        self.x1 -=self.VEL
+        self.x2 -= self.VEL
+
+        # logic that checks if any image is completely of the window - updating x1 & x2
+        if self.x1 + self.WIDTH < 0:
+            self.x1 = self.x2 + self.WIDTH
+
+        if self.x2 + self.WIDTH < 0:
+            self.x2 = self.x1 + self.WIDTH
@@ -0,0 +1,184 @@
+import os, argparse, multiprocessing, pickle, random, copy, queue, itertools, traceback
+
+os.environ["FLAPPY_HEADLESS"] = "1" # islands always train headless (SDL dummy driver)
+
+import neat
+import flappy_bird_ai as ai
+from flappy_policy import export
+
+# island model: several populations from the same config evolve in their own processes and every interval
+# generations send copies of their best genomes to the next island of a ring (island i -> i + 1), over
+# multiprocessing queues - nobody waits for anybody, migrants join whenever the receiving island next looks
+# the coordinator (this process) prints what the islands report and keeps the best genome any island found
+NODE_KEYS = 10 ** 6 # each island numbers its new nodes from its own block, so migrants never bring clashing node keys
+
+class IslandReporter(neat.reporting.BaseReporter):
+    # sends every generation's results to the coordinator and keeps copies of the island's best genomes for migration
+    def __init__(self, index, reports, migrants):
+        self.index = index
+        self.reports = reports
+        self.migrants = migrants
+        self.top = [] # copies of the best genomes of the last evaluated generation, best first
+        self.immigrants = set() # keys of genomes that came from another island
+        self.immigrant_wins = 0 # generations in which an immigrant was the island's best genome
+        self.solved = False
+        self.generation = 0
+
+    def start_generation(self, generation):
+        self.generation = generation
+
+    def post_evaluate(self, config, population, species, best_genome):
+        genomes = sorted(population.values(), key=lambda g: g.fitness, reverse=True)
+        self.top = [copy.deepcopy(g) for g in genomes[:self.migrants]]
+        if best_genome.key in self.immigrants:
+            self.immigrant_wins += 1
+        mean = sum(g.fitness for g in genomes) / len(genomes)
+        self.reports.put(("generation", self.index, self.generation, best_genome.fitness, mean, len(species.species)))
+
+    def found_solution(self, config, generation, best):
+        self.solved = not config.no_fitness_termination # without termination neat calls this after every run()
+
+# replaces the newest offspring of p's next generation with the migrants waiting in inbox, then re-speciates
+# migrants get new keys from this island - returns how many joined
+def receive(p, inbox, reporter):
+    migrants = []
+    while True:
+        try:
+            migrants += inbox.get_nowait()
+        except queue.Empty:
+            break
+    migrants = migrants[-len(p.population) // 2:] # never more than half the island
+    if not migrants:
+        return 0
+    for old in sorted(p.population)[-len(migrants):]:
+        del p.population[old]
+    for genome in migrants:
+        genome.key = next(p.reproduction.genome_indexer)
+        genome.fitness = None
+        p.reproduction.ancestors[genome.key] = tuple()
+        p.population[genome.key] = genome
+        reporter.immigrants.add(genome.key)
+    p.species.speciate(p.config, p.population, p.generation)
+    return len(migrants)
+
+# one island - runs in its own process until generations are done, a solution is found or stop is set
+# always ends with a "done" report, or an "error" report with the traceback when it fails
+def island(index, config_path, generations, interval, migrants, seed, inbox, outbox, reports, stop):
+    report = ("error", index, "island {0} was interrupted".format(index))
+    try:
+        random.seed(seed)
+        outbox.cancel_join_thread() # migrants the next island never picked up don't keep this process from exiting
+        config = ai.load_config(config_path)
+        config.genome_config.node_indexer = itertools.count((index + 1) * NODE_KEYS)
+        p = neat.Population(config)
+        reporter = IslandReporter(index, reports, migrants)
+        p.add_reporter(reporter)
+        ai.GEN = 0
+        sent = received = 0
+        done = 0
+        while done < generations and not reporter.solved and not stop.is_set():
+            chunk = min(interval, generations - done)
+            p.run(ai.main, chunk)
+            done += chunk
+            if reporter.solved or done >= generations:
+                break
+            outbox.put(reporter.top)
+            sent += len(reporter.top)
+            joined = receive(p, inbox, reporter)
+            received += joined
+            reports.put(("migration", index, p.generation, len(reporter.top), joined))
+        # best_genome is None when stop was set before the island evaluated anything
+        report = ("done", index, p.generation, pickle.dumps(p.best_genome), sent, received, reporter.immigrant_wins, reporter.solved)
+    except Exception:
+        report = ("error", index, traceback.format_exc())
+    finally:
+        reports.put(report)
+
+# starts the islands and reports on them until all are done - returns the best genome of all islands
+# winner_path and policy_path get the winner like flappy_bird_ai.run saves it
+def run(config_path, islands=4, generations=50, interval=5, migrants=2, seed=None, winner_path="winner.pkl", policy_path=None):
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    reports = multiprocessing.Queue()
+    inboxes = [multiprocessing.Queue() for _ in range(islands)]
+    stop = multiprocessing.Event() # set once an island reaches the fitness threshold
+    processes = [multiprocessing.Process(target=island, args=(i, config_path, generations, interval, migrants, seed + i,
+            inboxes[i], inboxes[(i + 1) % islands], reports, stop)) for i in range(islands)]
+    for process in processes:
+        process.start()
+
+    results = {} # island -> (generations, best genome or None, sent, received, immigrant wins, solved)
+    failed = {} # island -> why it ended without results
+    exited = set() # islands found dead without a report, failed if the queue is still empty on the next check
+    while len(results) + len(failed) < islands:
+        try:
+            report = reports.get(timeout=1)
+        except queue.Empty:
+            # an island killed before its last report can't send one - a report it did send is in the queue by the
+            # time its process has exited, so an island still silent one timeout after exiting has failed
+            for index, process in enumerate(processes):
+                if index in results or index in failed or process.is_alive():
+                    continue
+                if index in exited:
+                    failed[index] = "exited with code {0} without reporting".format(process.exitcode)
+                    print("Island {0} {1}".format(index, failed[index]))
+                exited.add(index)
+            continue
+        kind, index = report[0], report[1]
+        if kind == "generation":
+            generation, fitness, mean, species = report[2:]
+            print("Island {0} gen {1}: best {2:.2f}, avg {3:.2f}, {4} species".format(index, generation, fitness, mean, species))
+        elif kind == "migration":
+            generation, sent, joined = report[2:]
+            print("Island {0} gen {1}: sent {2} migrants to island {3}, {4} joined".format(index, generation, sent, (index + 1) % islands, joined))
+        elif kind == "error":
+            failed[index] = "failed"
+            print("Island {0} failed:\n{1}".format(index, report[2]))
+        else:
+            generation, genome, sent, received, wins, solved = report[2:]
+            results[index] = (generation, pickle.loads(genome), sent, received, wins, solved)
+            if solved:
+                stop.set()
+    for process in processes:
+        process.join()
+
+    print("\n{0:<8} {1:>11} {2:>12} {3:>6} {4:>9} {5:>15}".format("island", "generations", "best fitness", "sent", "received", "immigrant wins"))
+    for index in range(islands):
+        if index in failed:
+            print("{0:<8} {1}".format(index, failed[index]))
+            continue
+        generation, genome, sent, received, wins, solved = results[index]
+        if genome is None:
+            print("{0:<8} {1:>11} {2:>12}".format(index, generation, "-"))
+            continue
+        print("{0:<8} {1:>11} {2:>12.2f} {3:>6} {4:>9} {5:>15}{6}".format(index, generation, genome.fitness, sent, received, wins, "  solved" if solved else ""))
+    candidates = [index for index in results if results[index][1] is not None]
+    if not candidates:
+        print("No island evaluated a genome, nothing to save")
+        return None
+    index = max(candidates, key=lambda i: results[i][1].fitness)
+    winner = results[index][1]
+    print("Winner from island {0}, fitness {1:.2f}".format(index, winner.fitness))
+    if winner_path:
+        with open(winner_path, "wb") as f:
+            pickle.dump(winner, f)
+        print("Saved winner genome to {0}".format(winner_path))
+    if policy_path:
+        export(winner, ai.load_config(config_path)).save(policy_path)
+        print("Saved winner policy to {0}".format(policy_path))
+    return winner
+
+if __name__ == "__main__":
+    local_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Island model training - Flappy Bird")
+    parser.add_argument("--islands", type=int, default=os.cpu_count() or 1, help="populations, one process each (default: one per CPU)")
+    parser.add_argument("--generations", type=int, default=50, help="generations each island trains at most")
+    parser.add_argument("--interval", type=int, default=5, help="generations between migrations")
+    parser.add_argument("--migrants", type=int, default=2, help="best genomes an island sends to the next one at every migration")
+    parser.add_argument("--seed", type=int, help="island i's population and pipes come from seed + i (default: random)")
+    parser.add_argument("--config", default=os.path.join(local_dir, "config-feedforward.txt"), help="path to the NEAT config file, every island uses it")
+    parser.add_argument("--winner", default="winner.pkl", help="file the best genome of all islands is saved to")
+    parser.add_argument("--policy", default="winner.policy", help="file the winner is saved to as a standalone policy")
+    args = parser.parse_args()
+    if run(args.config, args.islands, args.generations, args.interval, args.migrants, args.seed, args.winner, args.policy) is None:
+        raise SystemExit(1)
@@ -0,0 +1,69 @@
+import numpy as np
+
+TICK_RATE = 30 # physics ticks per second at 1x - the speed the game was tuned for
+FPS = 60 # frames drawn per second at most, frames in between ticks are interpolated
+
+class FixedTimestep:
+    # accumulator for a fixed physics timestep - physics always advances in ticks of 1/TICK_RATE seconds,
+    # however long a frame took to draw, and speed runs that many more ticks in the same time
+    SPEEDS = (1, 8, 64) # fast-forward multipliers, cycled with cycle_speed()
+    MAX_FRAME_TIME = 0.25 # seconds of a slow frame that are made up for, the rest is dropped
+
+    def __init__(self, tick_rate=TICK_RATE):
+        self.dt = 1.0 / tick_rate
+        self.accumulator = 0.0 # simulated time still owed, always less than one tick after advance()
+        self.speed_index = 0
+
+    @property
+    def speed(self):
+        return self.SPEEDS[self.speed_index]
+
+    def cycle_speed(self):
+        self.speed_index = (self.speed_index + 1) % len(self.SPEEDS)
+        return self.speed
+
+    # elapsed is the wall time of the last frame in seconds - returns how many ticks to run now
+    def advance(self, elapsed):
+        self.accumulator += min(elapsed, self.MAX_FRAME_TIME) * self.speed
+        ticks = int(self.accumulator / self.dt)
+        self.accumulator -= ticks * self.dt
+        return ticks
+
+    # how far between the last tick and the next one this frame is drawn, 0 to 1
+    @property
+    def alpha(self):
+        return self.accumulator / self.dt
+
+class Interpolator:
+    # remembers positions before the last tick so a frame can be drawn part way to the current ones
+    # a position that moved more than max_step in one tick jumped (e.g. the base wrapping around) and is drawn as is
+    def __init__(self, max_step=100):
+        self.max_step = max_step
+        self.before = [] # (object, attribute, value before the last tick)
+
+    # items are (object, attribute) pairs - attributes can be numbers or numpy arrays
+    def capture(self, items):
+        self.before = []
+        for obj, attr in items:
+            value = getattr(obj, attr)
+            if isinstance(value, np.ndarray):
+                value = value.copy() # arrays are updated in place by the next tick
+            self.before.append((obj, attr, value))
+
+    # moves every captured object alpha of the way from its captured to its current position
+    # returns the current positions, for restore() once the frame is drawn
+    def apply(self, alpha):
+        after = []
+        for obj, attr, old in self.before:
+            new = getattr(obj, attr)
+            after.append((obj, attr, new))
+            if isinstance(new, np.ndarray):
+                if new.shape == np.shape(old):
+                    setattr(obj, attr, np.where(np.abs(new - old) > self.max_step, new, old + (new - old) * alpha))
+            elif abs(new - old) <= self.max_step:
+                setattr(obj, attr, old + (new - old) * alpha)
+        return after
+
+    def restore(self, after):
+        for obj, attr, value in after:
+            setattr(obj, attr, value)
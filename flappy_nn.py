@@ -0,0 +1,130 @@
+import neat
+import numpy as np
+
+from neat import activations, aggregations
+
+# numpy versions of neat's activation functions - same clamping as neat.activations so outputs match
+NP_ACTIVATIONS = {
+    activations.sigmoid_activation: lambda z: 1.0 / (1.0 + np.exp(-np.clip(5.0 * z, -60.0, 60.0))),
+    activations.tanh_activation: lambda z: np.tanh(np.clip(2.5 * z, -60.0, 60.0)),
+    activations.sin_activation: lambda z: np.sin(np.clip(5.0 * z, -60.0, 60.0)),
+    activations.gauss_activation: lambda z: np.exp(-5.0 * np.clip(z, -3.4, 3.4) ** 2),
+    activations.relu_activation: lambda z: np.where(z > 0.0, z, 0.0),
+    activations.identity_activation: lambda z: z,
+    activations.clamped_activation: lambda z: np.clip(z, -1.0, 1.0),
+    activations.abs_activation: np.abs,
+}
+
+class BatchNetwork:
+    # a whole population of neat.nn.FeedForwardNetwork compiled into padded per-layer weight matrices
+    # every layer of every network is evaluated with one numpy call per frame
+    #
+    # value slots of one row: [inputs | layer 1 nodes | layer 2 nodes | ... | constant 0]
+    # a node's layer is 1 + the deepest layer it reads from, so nets of different shapes share the layout
+    def __init__(self, nets):
+        self.num_inputs = len(nets[0].input_nodes)
+        self.num_outputs = len(nets[0].output_nodes)
+        n = len(nets)
+
+        # layer of every evaluated node, per net
+        node_layers = []
+        for net in nets:
+            layer = dict((k, 0) for k in net.input_nodes)
+            for node, act, agg, bias, response, links in net.node_evals:
+                if agg is not aggregations.sum_aggregation:
+                    raise ValueError("BatchNetwork only supports sum aggregation")
+                layer[node] = 1 + max([layer[i] for i, w in links] + [0])
+            node_layers.append(layer)
+
+        # slots needed by each layer = most nodes any net has on that layer
+        depth = max([max(layer.values()) for layer in node_layers] + [0])
+        width = [0] * (depth + 1)
+        for layer in node_layers:
+            counts = [0] * (depth + 1)
+            for l in layer.values():
+                counts[l] += 1
+            width = [max(a, b) for a, b in zip(width, counts)]
+        width[0] = self.num_inputs
+        offsets = [sum(width[:l]) for l in range(depth + 1)]
+        self.num_slots = sum(width) + 1 # last slot stays 0 for outputs no connection reaches
+        zero_slot = self.num_slots - 1
+
+        self.layers = [] # (offset, width, weights, bias, response, [(activation, columns)])
+        for l in range(1, depth + 1):
+            weights = np.zeros((n, offsets[l], width[l]))
+            bias = np.zeros((n, width[l]))
+            response = np.zeros((n, width[l]))
+            act_of = np.full((n, width[l]), None, dtype=object)
+            self.layers.append([offsets[l], width[l], weights, bias, response, act_of])
+
+        self.outputs = np.full((n, self.num_outputs), zero_slot)
+        for row, (net, layer) in enumerate(zip(nets, node_layers)):
+            slot = dict((k, i) for i, k in enumerate(net.input_nodes))
+            used = [0] * (depth + 1)
+            for node, act, agg, bias, response, links in net.node_evals:
+                l = layer[node]
+                slot[node] = offsets[l] + used[l]
+                col = used[l]
+                used[l] += 1
+                offset, w, weights, biases, responses, act_of = self.layers[l - 1]
+                for i, weight in links:
+                    weights[row, slot[i], col] += weight
+                biases[row, col] = bias
+                responses[row, col] = response
+                act_of[row, col] = act
+            for j, k in enumerate(net.output_nodes):
+                if k in slot:
+                    self.outputs[row, j] = slot[k]
+
+        # group the columns of each layer by activation function
+        for layer in self.layers:
+            act_of = layer[5]
+            groups = []
+            for act in set(act_of[act_of != None]):
+                np_act = NP_ACTIVATIONS.get(act) or np.vectorize(act, otypes=[float])
+                groups.append((np_act, act_of == act))
+            if len(groups) == 1:
+                groups = [(groups[0][0], None)] # padding columns are never read, so one call covers the layer
+            layer[5] = groups
+
+        self.values = np.zeros((n, self.num_slots))
+
+    @staticmethod
+    def create(genomes, config):
+        return BatchNetwork([neat.nn.FeedForwardNetwork.create(g, config) for g in genomes])
+
+    def __len__(self):
+        return len(self.values)
+
+    # keeps only the nets of the rows in keep (a bool mask or row indices), in order - e.g. after BirdPopulation.cull
+    def keep_rows(self, keep):
+        for layer in self.layers:
+            layer[2], layer[3], layer[4] = layer[2][keep], layer[3][keep], layer[4][keep]
+            layer[5] = [(act, columns if columns is None else columns[keep]) for act, columns in layer[5]]
+        self.outputs = self.outputs[keep]
+        self.values = self.values[keep]
+
+    # whether the nets of these rows are the same network (same weights, biases, responses, activations and outputs)
+    def rows_identical(self, rows):
+        first, rest = rows[0], rows[1:]
+        for offset, width, weights, bias, response, groups in self.layers:
+            for a in (weights, bias, response):
+                if not (a[rest] == a[first]).all():
+                    return False
+            for act, columns in groups:
+                if columns is not None and not (columns[rest] == columns[first]).all():
+                    return False
+        return bool((self.outputs[rest] == self.outputs[first]).all())
+
+    # inputs is an (n, num_inputs) array, one row per net - returns an (n, num_outputs) array
+    def activate(self, inputs):
+        values = self.values
+        values[:, :self.num_inputs] = inputs
+        for offset, width, weights, bias, response, groups in self.layers:
+            z = bias + response * np.einsum("ns,nsm->nm", values[:, :offset], weights)
+            for act, columns in groups:
+                if columns is None:
+                    values[:, offset:offset + width] = act(z)
+                else:
+                    values[:, offset:offset + width][columns] = act(z[columns])
+        return np.take_along_axis(values, self.outputs, axis=1)
@@ -0,0 +1,115 @@
+import json, math, struct
+
+# a trained network as a standalone policy: only the nodes the output depends on, in evaluation order, with their
+# inputs as slot numbers - playing it needs neither neat nor the config, just this module
+# policy file: .json, or binary - header, outputs, then every node (activation, bias, response, links)
+MAGIC = b"FBPL"
+VERSION = 1
+HEADER = struct.Struct("<4sBHHHd") # magic, version, inputs, outputs, nodes, fitness
+OUTPUT = struct.Struct("<i") # slot of an output, -1 when no connection reaches it
+NODE = struct.Struct("<BddH") # activation, bias, response, links
+LINK = struct.Struct("<id") # slot (-1 for the constant 0), weight
+
+# the activation functions a policy can use - same clamping as neat.activations, so outputs match exactly
+ACTIVATIONS = {
+    "sigmoid": lambda z: 1.0 / (1.0 + math.exp(-max(-60.0, min(60.0, 5.0 * z)))),
+    "tanh": lambda z: math.tanh(max(-60.0, min(60.0, 2.5 * z))),
+    "sin": lambda z: math.sin(max(-60.0, min(60.0, 5.0 * z))),
+    "gauss": lambda z: math.exp(-5.0 * max(-3.4, min(3.4, z)) ** 2),
+    "relu": lambda z: z if z > 0.0 else 0.0,
+    "identity": lambda z: z,
+    "clamped": lambda z: max(-1.0, min(1.0, z)),
+    "abs": abs,
+}
+ACTIVATION_NAMES = tuple(sorted(ACTIVATIONS)) # activation numbers of the binary format
+
+class Policy:
+    # slots: [inputs | one per node, in order] - node i reads earlier slots and writes slot num_inputs + i
+    def __init__(self, num_inputs, outputs, nodes, fitness=0.0):
+        self.num_inputs = num_inputs
+        self.outputs = outputs # slot of each output, -1 for an output no connection reaches (always 0.0)
+        self.nodes = nodes # (activation name, bias, response, [(slot, weight)]) in evaluation order, slot -1 is 0.0
+        self.fitness = fitness # the genome's fitness when it was exported
+        self.activate = self.compile()
+
+    # the network as one python function of the input list, returning the list of outputs - no dicts, no loops,
+    # every weight a constant - it adds up in the same order as neat's FeedForwardNetwork.activate, so the results match
+    def compile(self):
+        def name(slot):
+            return "v{0}".format(int(slot)) if slot >= 0 else "0.0"
+        lines = ["def activate(inputs):"]
+        if self.num_inputs:
+            lines.append("    {0}, = inputs".format(", ".join(name(i) for i in range(self.num_inputs))))
+        for i, (act, bias, response, links) in enumerate(self.nodes):
+            if act not in ACTIVATIONS: # names and numbers only, a policy file can't put code in here
+                raise ValueError("policies don't support the {0!r} activation".format(act))
+            total = "".join(" + {0} * {1!r}".format(name(slot), float(weight)) for slot, weight in links)
+            lines.append("    {0} = {1}({2!r} + {3!r} * (0.0{4}))".format(name(self.num_inputs + i), act, float(bias), float(response), total))
+        lines.append("    return [{0}]".format(", ".join(name(slot) for slot in self.outputs)))
+        namespace = dict(ACTIVATIONS)
+        exec("\n".join(lines), namespace)
+        return namespace["activate"]
+
+    def save(self, path):
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump({"format": "flappy-policy", "version": VERSION, "inputs": self.num_inputs, "fitness": self.fitness,
+                        "outputs": self.outputs, "nodes": self.nodes}, f)
+            return
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.num_inputs, len(self.outputs), len(self.nodes), self.fitness))
+            for slot in self.outputs:
+                f.write(OUTPUT.pack(slot))
+            for act, bias, response, links in self.nodes:
+                f.write(NODE.pack(ACTIVATION_NAMES.index(act), bias, response, len(links)))
+                for slot, weight in links:
+                    f.write(LINK.pack(slot, weight))
+
+    @staticmethod
+    def load(path):
+        if path.endswith(".json"):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("format") != "flappy-policy" or data.get("version") != VERSION:
+                raise ValueError("{0} is not a version {1} policy file".format(path, VERSION))
+            nodes = [(act, bias, response, [tuple(link) for link in links]) for act, bias, response, links in data["nodes"]]
+            return Policy(data["inputs"], data["outputs"], nodes, data["fitness"])
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, num_inputs, num_outputs, num_nodes, fitness = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{0} is not a version {1} policy file".format(path, VERSION))
+        at = HEADER.size
+        outputs = []
+        for _ in range(num_outputs):
+            outputs.append(OUTPUT.unpack_from(data, at)[0])
+            at += OUTPUT.size
+        nodes = []
+        for _ in range(num_nodes):
+            act, bias, response, count = NODE.unpack_from(data, at)
+            at += NODE.size
+            links = []
+            for _ in range(count):
+                links.append(LINK.unpack_from(data, at))
+                at += LINK.size
+            nodes.append((ACTIVATION_NAMES[act], bias, response, links))
+        return Policy(num_inputs, outputs, nodes, fitness)
+
+# a genome as a Policy - neat's FeedForwardNetwork already keeps only enabled connections of the nodes the outputs need
+def export(genome, config):
+    import neat # only exporting needs neat, playing a policy doesn't
+    net = neat.nn.FeedForwardNetwork.create(genome, config)
+    slot = dict((k, i) for i, k in enumerate(net.input_nodes))
+    num_inputs = len(net.input_nodes)
+    nodes = []
+    for node, act, agg, bias, response, links in net.node_evals:
+        gene = genome.nodes[node]
+        if gene.aggregation != "sum":
+            raise ValueError("policies only support sum aggregation, node {0} uses {1}".format(node, gene.aggregation))
+        if gene.activation not in ACTIVATIONS:
+            raise ValueError("policies don't support the {0} activation of node {1}".format(gene.activation, node))
+        # a link from a node that is never evaluated (an output nothing reaches) reads the constant 0 slot
+        nodes.append((gene.activation, bias, response, [(slot.get(i, -1), weight) for i, weight in links]))
+        slot[node] = num_inputs + len(nodes) - 1
+    outputs = [slot.get(k, -1) for k in net.output_nodes]
+    return Policy(num_inputs, outputs, nodes, genome.fitness or 0.0)
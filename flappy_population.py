@@ -0,0 +1,383 @@
+import random, time, copy
+import numpy as np
+
+from flappy_core import Pipe, Base, FLOOR, BIRD_SIZE, masks
+
+class BirdPopulation:
+    # struct-of-arrays version of Bird - one row per bird, every update is one numpy operation for the whole flock
+    # dead birds keep their row until cull() drops all of them at once, index maps rows back to the birds' first rows
+    ROWS = ("y", "tilt", "tick_count", "vel", "height", "img_count", "img", "alive", "fitness", "index", "course") # arrays with a row per bird
+    MAX_ROTATION = 25 # for tilting the bird +25 or -25 degree
+    ROT_VEL = 20 # number times to rotate the image per frame every time we move bird
+    ANIMATION_TIME = 5 # control flappy bird's flapping (image shuffle)
+
+    def __init__(self, n, x, y):
+        self.x = x # every bird flies at the same x coordinate
+        self.y = np.full(n, y, dtype=float) # y coordinate of each bird
+        self.tilt = np.zeros(n) # bird's tilting (will start with no tilt)
+        self.tick_count = np.zeros(n, dtype=int) # tracks moves since each bird's last jump
+        self.vel = np.zeros(n) # velocity set by the last jump
+        self.height = self.y.copy() # y-coord each bird jumped from
+        self.img_count = np.zeros(n, dtype=int) # tracks image for shuffling
+        self.img = np.zeros(n, dtype=int) # index into Bird.IMGS currently shown for each bird
+        self.alive = np.ones(n, dtype=bool) # birds still in the game
+        self.fitness = np.zeros(n) # fitness collected by each bird
+        self.index = np.arange(n) # row each bird had before any cull - its genome's position
+        self.course = np.zeros(n, dtype=int) # pipe course each bird flies, see Episode
+        self.final_fitness = np.zeros(n) # fitness of the culled birds, by index
+
+    def __len__(self):
+        return len(self.y)
+
+    # will flap-up every bird in the flap mask
+    def jump(self, flap):
+        self.vel[flap] = -10.5 # for flapping bird upwards
+        self.tick_count[flap] = 0 # resetting jump counter to 0 for frame
+        self.height[flap] = self.y[flap] # after jump it'll update the height of bird (assigns y-coord)
+
+    # invoked in every single frame to move all birds - same arithmetic as Bird.move, so results match it exactly
+    def move(self):
+        self.tick_count += 1 # records the numbr of times we moved bird since the last jump
+
+        # displacement of every bird, e.g: -10.5 * 1 + 1.5 * (1) ** 2 = -9, ... -7, -5, -3, -1
+        d = self.vel * self.tick_count + 1.5*self.tick_count ** 2
+        np.minimum(d, 16, out=d) # terminal velocity
+        d[d < 0] -= 2 # move up little bit
+
+        self.y += d # updates y-coord smoothly (whether it's upward or downward)
+
+        # tilting the birds based on their jump. (tilt down if it falls and vice-versa)
+        rising = (d < 0) | (self.y < self.height + 50)
+        self.tilt[rising & (self.tilt < self.MAX_ROTATION)] = self.MAX_ROTATION
+        self.tilt[~rising & (self.tilt > -90)] -= self.ROT_VEL
+
+    # advances the flapping animation the way Bird.draw does - only called when the birds are drawn
+    def animate(self):
+        self.img_count += 1
+        c = self.img_count
+        t = self.ANIMATION_TIME
+        # wings-down, leveled-wings, wings-up, leveled-wings, wings-down
+        self.img = np.select([c < t, c < t*2, c < t*3, c < t*4], [0, 1, 2, 1], 0)
+        c[c >= t*4] = 0 # image counter reset
+
+        # to avoid flapping of wings while falling
+        falling = self.tilt <= -80
+        self.img[falling] = 1
+        c[falling] = t*2
+
+    # birds that hit the floor or shoot into the sky
+    def out_of_bounds(self, floor, bird_height):
+        return self.alive & ((self.y + bird_height >= floor) | (self.y < 0))
+
+    # removes birds from the game, dead birds keep their last fitness
+    def kill(self, dead):
+        self.alive &= ~dead
+
+    # at least half the rows are dead - dropping them now costs about as much as the frames they'd still cost
+    def should_cull(self):
+        return 2 * np.count_nonzero(self.alive) <= len(self.alive) and not self.alive.all()
+
+    # drops the rows of every dead bird in one O(n) pass, the living keep their order
+    # returns the bool mask of the rows kept, for whatever else is kept in step with the rows (e.g. networks)
+    def cull(self):
+        keep = self.alive
+        dead = ~keep
+        self.final_fitness[self.index[dead]] = self.fitness[dead]
+        for name in self.ROWS:
+            setattr(self, name, getattr(self, name)[keep])
+        return keep
+
+    # fitness of every bird, culled or not, in the order of the first rows
+    def all_fitness(self):
+        fitness = self.final_fitness.copy()
+        fitness[self.index] = self.fitness
+        return fitness
+
+    # a copy of some of the rows (a bool mask or row indices), e.g. the birds of one course for drawing
+    def subset(self, rows):
+        part = copy.copy(self)
+        for name in self.ROWS:
+            setattr(part, name, getattr(self, name)[rows])
+        return part
+
+class FitnessStats:
+    # running statistics of the current fitness of every genome in a generation - each update is O(1)
+    def __init__(self, count=0):
+        self.count = count # genomes in the generation
+        self.total = 0.0 # sum of their current fitness
+        self.best = 0.0 # best fitness any genome has reached
+
+    # n genomes changed their fitness by delta each
+    def add(self, delta, n=1):
+        self.total += delta * n
+
+    # a genome reached this fitness
+    def observe(self, fitness):
+        if fitness > self.best:
+            self.best = fitness
+
+    # folds in the statistics of another batch of the same generation
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.observe(other.best)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+class PipeSet:
+    # the pipes of several courses at the same x - each course draws its heights from its own random source,
+    # so course k gets exactly the pipes of a one-course Episode with its seed
+    WIDTH = Pipe.WIDTH
+    GAP = Pipe.GAP
+
+    __slots__ = ("x", "passed", "pipes", "height", "top", "bottom")
+
+    def __init__(self, x, rngs):
+        self.x = x
+        self.passed = False # birds passed the pipe or not - they all fly at the same x
+        self.pipes = [Pipe(x, rng) for rng in rngs] # one per course, their x is only synced by course()
+        self.height = np.array([pipe.height for pipe in self.pipes]) # per course, like top and bottom
+        self.top = np.array([pipe.top for pipe in self.pipes])
+        self.bottom = np.array([pipe.bottom for pipe in self.pipes])
+
+    def move(self):
+        self.x -= Pipe.VEL
+
+    # the Pipe of course k, at this set's x
+    def course(self, k):
+        pipe = self.pipes[k]
+        pipe.x = self.x
+        return pipe
+
+# top and bottom of the gap each bird has to get through - scalars for a Pipe, one per bird for a PipeSet
+def gap_rows(pipe, birds):
+    if isinstance(pipe, PipeSet):
+        return pipe.height[birds.course], pipe.bottom[birds.course]
+    return pipe.height, pipe.bottom
+
+# collision check of a pipe (or PipeSet) against a whole BirdPopulation - returns a bool array of the living birds that hit it
+def collide_population(pipe, birds):
+    hit = np.zeros(len(birds), dtype=bool)
+    bird_w, bird_h = BIRD_SIZE
+    y = np.round(birds.y).astype(int) # same rounding as round() in Pipe.collide
+    # same cheap rejection as Pipe.collide, for every bird at once - only boxes touching the pipe get a pixel test
+    if birds.x + bird_w <= pipe.x or birds.x >= pipe.x + pipe.WIDTH:
+        return hit
+    height, bottom = gap_rows(pipe, birds)
+    near = birds.alive & ((y < height) | (y + bird_h > bottom))
+    bird_masks = masks()["bird"]
+    for i in np.flatnonzero(near):
+        course = pipe if isinstance(pipe, Pipe) else pipe.course(birds.course[i])
+        hit[i] = course.collide_at(bird_masks[birds.img[i]], birds.x, int(y[i]))
+    return hit
+
+class Courses:
+    # every genome flies count pipe courses in one Episode, the same courses for the whole population (common
+    # random numbers), and its fitness is the mean, the min or a quantile of its fitness on them
+    AGGREGATES = ("mean", "min", "quantile")
+
+    def __init__(self, count=1, aggregate="mean", quantile=0.25):
+        if count < 1:
+            raise ValueError("courses must be at least 1, not {0}".format(count))
+        if aggregate not in self.AGGREGATES:
+            raise ValueError("aggregate must be one of {0}, not {1!r}".format(", ".join(self.AGGREGATES), aggregate))
+        if not 0 <= quantile <= 1:
+            raise ValueError("quantile must be between 0 and 1, not {0}".format(quantile))
+        self.count = count
+        self.aggregate = aggregate
+        self.quantile = quantile
+
+    # fitness of every genome from the fitness of every row of an Episode with these courses (course after course)
+    def fitness(self, rows):
+        rows = rows.reshape(self.count, -1)
+        if self.aggregate == "min":
+            return rows.min(axis=0)
+        if self.aggregate == "quantile":
+            return np.quantile(rows, self.quantile, axis=0)
+        return rows.mean(axis=0)
+
+class Budget:
+    # limits on one evaluation, checked after every frame - 0 / None means no limit
+    # all living birds have the same fitness (they fly the same x and collect the same rewards), so stopping
+    # a game early never reorders them: every bird that died keeps its fitness and the survivors stay tied
+    def __init__(self, max_frames=0, max_score=0, fitness_threshold=None, stop_identical=False):
+        self.max_frames = max_frames
+        self.max_score = max_score
+        self.fitness_threshold = fitness_threshold # stop once the survivors reach it (neat ends the run then)
+        self.stop_identical = stop_identical # stop once every survivor has the same network
+
+    # why the episode has to stop now, None while it can go on
+    def check(self, episode):
+        birds = episode.birds
+        if self.max_frames and episode.frames >= self.max_frames:
+            return "max frames"
+        if self.max_score and episode.score >= self.max_score:
+            return "max score"
+        # on several courses a genome's fitness is an aggregate over them, one row reaching the threshold says nothing
+        if self.fitness_threshold is not None and episode.courses == 1 and birds.alive.any() and birds.fitness[birds.alive].max() >= self.fitness_threshold:
+            return "fitness threshold"
+        if self.stop_identical and episode.survivors_identical():
+            return "identical survivors"
+        return None
+
+class Episode:
+    # one game of a flock of birds on the pipe sequence of a seed, advanced one frame per step() - draws nothing
+    # the same seed and the same flaps always give the same game
+    # with several courses every bird plays each of them in the same pass: row k * n + i is bird i on course k,
+    # course k has the pipes of seed + k - pipes of all courses share their x, only their heights differ
+    def __init__(self, n, seed, budget=None, courses=1):
+        self.n = n # birds on each course
+        self.seed = seed
+        self.courses = courses
+        self.seeds = [seed + k for k in range(courses)]
+        self.rngs = [random.Random(s) for s in self.seeds] # random source of every pipe height of each course
+        self.rng = self.rngs[0]
+        self.birds = BirdPopulation(n * courses, 230, 350)
+        self.birds.course = np.repeat(np.arange(courses), n)
+        # create base object
+        self.base = Base(FLOOR)
+        # create pipes list
+        self.pipes = [self.new_pipe(600)]
+        self.score = 0
+        self.frames = 0 # frames played so far
+        self.stats = FitnessStats(n * courses) # avg/best fitness of all rows kept up to date as the game runs
+        self.profiler = None # a flappy_profile.Profiler times every phase of step() when set
+        self.on_cull = None # called with the kept rows when dead birds are culled, e.g. BatchNetwork.keep_rows
+        self.budget = budget # a Budget that can end the game before every bird is dead
+        self.stop_reason = None # the limit of the budget that ended the game
+        self.same_policy = None # same_policy(rows) tells whether those rows have the same network, e.g. BatchNetwork.rows_identical
+        self.identical = (-1, False) # (survivors, whether they were identical) of the last survivors_identical()
+
+    # no birds left or the budget ran out so the game is over
+    @property
+    def over(self):
+        return self.stop_reason is not None or not self.birds.alive.any()
+
+    # two or more survivors with the same network started in the same state and see the same pipes,
+    # so they make the same moves forever - nothing they do from now on can tell them apart
+    def survivors_identical(self):
+        if self.same_policy is None:
+            return False
+        rows = np.flatnonzero(self.birds.alive)
+        if len(rows) != self.identical[0]: # networks only need comparing again when somebody died
+            courses = self.birds.course[rows]
+            same_course = (courses == courses[0]).all() if len(rows) else False # other pipes, other moves
+            self.identical = (len(rows), len(rows) > 1 and same_course and self.same_policy(rows))
+        return self.identical[1]
+
+    # a Pipe, or a PipeSet with a pipe for every course
+    def new_pipe(self, x):
+        if self.courses == 1:
+            return Pipe(x, self.rng)
+        return PipeSet(x, self.rngs)
+
+    # birds and pipes of course k, e.g. the one a window shows
+    def course_view(self, k=0):
+        if self.courses == 1:
+            return self.birds, self.pipes
+        return self.birds.subset(self.birds.course == k), [pipe.course(k) for pipe in self.pipes]
+
+    # pipe the birds have to get through next
+    def next_pipe(self):
+        pipes = self.pipes
+        if len(pipes) > 1 and self.birds.x > pipes[0].x + pipes[0].WIDTH:
+            return pipes[1]
+        return pipes[0]
+
+    # plays one frame - decide(episode, pipe) returns a bool array of the birds (rows of self.birds) that flap after moving
+    # returns the flaps that were applied on the first course, one per bird in the order of the first rows
+    # - the game a replay of the seed shows, the birds of the other courses don't change it
+    def step(self, decide):
+        birds, stats, profiler = self.birds, self.stats, self.profiler
+        if profiler is not None:
+            t = time.perf_counter()
+        next_pipe = self.next_pipe()
+
+        alive = np.count_nonzero(birds.alive)
+        birds.move()
+        birds.fitness[birds.alive] += 0.1
+        stats.add(0.1, alive)
+        stats.observe(birds.fitness[birds.alive].max())
+        if profiler is not None:
+            t = profiler.lap("move", t)
+
+        flap = birds.alive & decide(self, next_pipe)
+        birds.jump(flap)
+        flaps = np.zeros(len(birds.final_fitness), dtype=bool)
+        flaps[birds.index] = flap
+        if profiler is not None:
+            t = profiler.lap("activate", t)
+
+        add_pipe = False
+        rem = []
+        # loops for each pipe in pipes list
+        for pipe in self.pipes:
+            # checks whether bird has passed the pipe or not ?
+            if birds.alive.any() and not pipe.passed and pipe.x < birds.x:
+                pipe.passed = True
+                add_pipe = True
+
+            # collision check
+            hit = collide_population(pipe, birds)
+            if hit.any():
+                birds.fitness[hit] -= 1
+                stats.add(-1, np.count_nonzero(hit))
+                birds.kill(hit)
+
+            if pipe.x + pipe.WIDTH < 0: # whether pipe is completely off the screen or not ?
+                rem.append(pipe) # add it to rem list
+            pipe.move() # moves pipe 
+        if profiler is not None:
+            t = profiler.lap("collide", t)
+
+        # will append new pipe in pipes list
+        if add_pipe:
+            self.score += 1
+            birds.fitness[birds.alive] += 5
+            stats.add(5, np.count_nonzero(birds.alive))
+            if birds.alive.any(): # the game can end on this frame, before the next move observes the bonus
+                stats.observe(birds.fitness[birds.alive].max())
+            self.pipes.append(self.new_pipe(600))
+
+        # removes pipes which are off the screen
+        for r in rem:
+            self.pipes.remove(r)
+
+        # check whether bird hits the floor or shoots into the sky
+        birds.kill(birds.out_of_bounds(FLOOR, BIRD_SIZE[1]))
+        if birds.should_cull():
+            keep = birds.cull()
+            if self.on_cull is not None:
+                self.on_cull(keep)
+
+        self.base.move()
+        # the shown image sets the bird's mask and height, so the animation runs whether or not anything is drawn
+        birds.animate()
+        self.frames += 1
+        if self.budget is not None:
+            self.stop_reason = self.budget.check(self)
+        if profiler is not None:
+            profiler.lap("other", t)
+            profiler.tick(alive)
+        return flaps[:self.n]
+
+    # runs up to ticks steps (fewer if the game ends) and gives every flap mask to recorder
+    # and the episode after every step to observe, e.g. Telemetry.frame
+    # positions before the last step go to interpolator, so the frame can be drawn between the last two steps
+    def advance(self, decide, ticks, interpolator, recorder=None, observe=None):
+        for i in range(ticks):
+            if self.over:
+                break
+            if i == ticks - 1:
+                interpolator.capture(self.positions())
+            flap = self.step(decide)
+            if recorder is not None:
+                recorder.record(flap)
+            if observe is not None:
+                observe(self)
+
+    # (object, attribute) of everything that moves on screen
+    def positions(self):
+        return [(self.birds, "y"), (self.base, "x1"), (self.base, "x2")] + [(pipe, "x") for pipe in self.pipes]
@@ -0,0 +1,98 @@
+import csv, json, sys, time
+
+try:
+    import resource # peak memory, not available on Windows
+except ImportError:
+    resource = None
+
+PHASES = ("move", "activate", "collide", "other", "draw") # phases of a frame, in the order they run
+
+# peak resident memory of this process in MB, None where the platform can't tell
+def peak_memory_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024 # bytes on macOS, KB elsewhere
+
+class Profiler:
+    # wall time spent in each phase of the game loop during one generation
+    # the loop calls lap() between phases - when profiling is off there is no Profiler and nothing is timed
+    def __init__(self):
+        self.seconds = dict((phase, 0.0) for phase in PHASES)
+        self.frames = 0 # ticks simulated
+        self.bird_frames = 0 # birds alive in each tick, summed - every one of them was moved and evaluated
+        self.started = time.perf_counter()
+        self.wall = 0.0 # seconds from start to stop()
+        self.peak_memory = None
+
+    # adds the time since t to phase, returns now for the next phase
+    def lap(self, phase, t):
+        now = time.perf_counter()
+        self.seconds[phase] += now - t
+        return now
+
+    def tick(self, alive):
+        self.frames += 1
+        self.bird_frames += int(alive)
+
+    def stop(self):
+        self.wall = time.perf_counter() - self.started
+        self.peak_memory = peak_memory_mb()
+
+    # folds in a batch of the same generation that ran in parallel with this one
+    def merge(self, other):
+        for phase in PHASES:
+            self.seconds[phase] += other.seconds[phase]
+        self.frames = max(self.frames, other.frames)
+        self.bird_frames += other.bird_frames
+        self.wall = max(self.wall, other.wall)
+        if other.peak_memory is not None:
+            self.peak_memory = max(self.peak_memory or 0.0, other.peak_memory)
+
+    @property
+    def birds_per_second(self):
+        wall = self.wall or time.perf_counter() - self.started
+        return self.bird_frames / wall if wall else 0.0
+
+    # ms per frame spent in phase
+    def per_frame(self, phase):
+        return self.seconds[phase] * 1000 / self.frames if self.frames else 0.0
+
+    # text lines for the on-screen overlay, averages of the generation so far
+    def overlay(self):
+        lines = ["{0}: {1:.3f} ms".format(phase, self.per_frame(phase)) for phase in PHASES]
+        lines.append("birds/s: {0:.0f}".format(self.birds_per_second))
+        return lines
+
+    # one row of the per-generation export
+    def row(self, gen):
+        row = {"generation": gen, "frames": self.frames, "bird_frames": self.bird_frames,
+               "wall_s": round(self.wall, 6), "birds_per_second": round(self.birds_per_second, 1)}
+        for phase in PHASES:
+            row[phase + "_ms"] = round(self.seconds[phase] * 1000, 3)
+            row[phase + "_ms_per_frame"] = round(self.per_frame(phase), 6)
+        row["peak_memory_mb"] = None if self.peak_memory is None else round(self.peak_memory, 1)
+        return row
+
+class ProfileLog:
+    # per-generation profiler rows, written to path after every generation
+    # a .json path gets a list of objects, any other path a CSV file - no path only keeps them in rows
+    def __init__(self, path=None):
+        self.path = path
+        self.rows = []
+
+    def add(self, gen, profiler):
+        row = profiler.row(gen)
+        self.rows.append(row)
+        if self.path is None:
+            return row
+        if self.path.endswith(".json"):
+            with open(self.path, "w") as f:
+                json.dump(self.rows, f, indent=1)
+        else:
+            with open(self.path, "a" if len(self.rows) > 1 else "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=list(row))
+                if len(self.rows) == 1:
+                    writer.writeheader()
+                writer.writerow(row)
+        return row
@@ -0,0 +1,248 @@
+import pygame
+import numpy as np
+import flappy_assets
+
+from collections import OrderedDict
+from flappy_core import WIN_WIDTH, WIN_HEIGHT
+
+class TextCache:
+    # rendered text surfaces keyed by (font, text, colour) - the least recently used one is dropped when full
+    # size=0 turns caching off, every call renders its whole string again
+    def __init__(self, size=128):
+        self.size = size
+        self.surfaces = OrderedDict()
+
+    def render(self, font, text, colour):
+        if self.size == 0:
+            return font.render(text, 1, colour) # 1 is for anti-aliasing
+        key = (font, text, colour)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, 1, colour) # 1 is for anti-aliasing
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+    # blits text at pos one cached glyph at a time - for values that change every frame, e.g. fitness
+    # returns the rect covered by the text
+    def blit_glyphs(self, win, font, text, colour, pos):
+        if self.size == 0:
+            return win.blit(font.render(text, 1, colour), pos)
+        x, y = pos
+        rect = pygame.Rect(pos, (0, 0))
+        for char in text:
+            glyph = self.render(font, char, colour)
+            rect.union_ip(win.blit(glyph, (x, y)))
+            x += glyph.get_width()
+        return rect
+
+class RotationCache:
+    # (image, tilt) -> (rotated image, offset of its top-left from the unrotated image's top-left)
+    # tilt only takes a few values (25, 5, -15, ... and 0, -20, ...) so every bird sprite is rotated once, lazily
+    def __init__(self):
+        self.sprites = {}
+
+    def get(self, img, tilt):
+        key = (img, tilt)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            rotated_image = pygame.transform.rotate(img, tilt)
+            new_rect = rotated_image.get_rect(center=img.get_rect().center) # rotate around the image's center
+            sprite = self.sprites[key] = (rotated_image, new_rect.topleft)
+        return sprite
+
+    # draws img tilted around its center, img's top-left at (x, y) - returns the blitted rect
+    def blit(self, win, img, tilt, x, y):
+        rotated_image, (dx, dy) = self.get(img, tilt)
+        rect = img.get_rect(topleft = (x, y))
+        return win.blit(rotated_image, (rect.x + dx, rect.y + dy)) # win.blit(source, destination)
+
+class DirtyRenderer:
+    # draws frames onto win over a static background, but only touches what changed since the last frame:
+    # the background is restored under last frame's sprites and only those plus this frame's reach the display
+    # what a frame drew is kept as the TILE pixel tiles it touched, so overlapping rects (a sprite's old and new place,
+    # birds of a flock) count once and the display gets a few non-overlapping rects, however many were drawn
+    TILE = 16
+    FULL = 0.75 # part of the window that is cheaper to update in one go than as separate rects
+
+    def __init__(self, win, background):
+        self.win = win
+        self.background = background # blitted at (0, 0)
+        self.shape = (-(-win.get_height() // self.TILE), -(-win.get_width() // self.TILE)) # tile rows, tile columns
+        self.drawn = None # tiles drawn on last frame, None = the whole window has to be redrawn
+
+    # the whole window is redrawn next frame, e.g. after something else drew over it
+    def invalidate(self):
+        self.drawn = None
+
+    # starts a frame - clears last frame's sprites
+    def begin(self):
+        cover = None if self.drawn is None else self.cover(self.drawn)
+        if cover is None:
+            self.win.blit(self.background, (0, 0))
+        else:
+            for rect in cover:
+                self.win.blit(self.background, rect, rect)
+
+    # ends a frame, rects are everything drawn since begin() - apart from lines, an (n, 5) array of the
+    # start x, y, end x, y and width of lines drawn, whose bounding rects would be mostly empty
+    def end(self, rects, lines=None):
+        tiles = self.mark(rects, lines)
+        cover = None if self.drawn is None else self.cover(tiles | self.drawn) # old places have to be cleared, new ones drawn
+        if cover is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(cover)
+        self.drawn = tiles
+
+    # the tiles touched by rects and lines
+    def mark(self, rects, lines):
+        tiles, t = np.zeros(self.shape, dtype=bool), self.TILE
+        for rect in rects:
+            tiles[max(rect.top, 0) // t:-(-rect.bottom // t), max(rect.left, 0) // t:-(-rect.right // t)] = True
+        if lines is not None and len(lines):
+            self.mark_lines(tiles, lines)
+        return tiles
+
+    # tiles as a few rects clipped to the window - runs of tiles in a tile row, merged with the run below when they
+    # line up - None when they cover most of the window, one full blit/update is cheaper than that many small ones
+    def cover(self, tiles):
+        t = self.TILE
+        if np.count_nonzero(tiles) >= self.FULL * tiles.size:
+            return None
+        # runs of dirty tiles in every tile row: starts and ends alternate in the changes of a padded row
+        edges = np.flatnonzero(np.diff(tiles, axis=1, prepend=False, append=False))
+        row, col = np.divmod(edges, tiles.shape[1] + 1)
+        window = self.win.get_rect()
+        cover = []
+        last = {} # (start, end) -> rect of the run with those columns that ends on the row above
+        for r, start, end in zip(row[::2].tolist(), col[::2].tolist(), col[1::2].tolist()):
+            rect = last.get((start, end))
+            if rect is not None and rect.bottom == r * t:
+                rect.h += t
+            else:
+                rect = pygame.Rect(start * t, r * t, (end - start) * t, t)
+                cover.append(rect)
+                last[(start, end)] = rect
+        return [rect.clip(window) for rect in cover]
+
+    # marks the tiles of every line: in each tile row it reaches, the columns between the leftmost and rightmost point
+    # of the line that is close enough to the row to draw into it - a thick line's pixels are within its width of its
+    # centre line
+    def mark_lines(self, tiles, lines):
+        t = self.TILE
+        rows, columns = tiles.shape
+        x0, y0, x1, y1, width = lines.T
+        low, high = np.minimum(y0, y1), np.maximum(y0, y1)
+        dy = y1 - y0
+        slope = np.divide(x1 - x0, dy, out=np.zeros(len(lines)), where=dy != 0)
+        first = np.clip((low - width) // t, 0, rows - 1).astype(int)
+        counts = np.clip((high + width) // t, 0, rows - 1).astype(int) - first + 1
+        # one entry per (line, tile row it reaches)
+        line = np.repeat(np.arange(len(lines)), counts)
+        row = np.arange(len(line)) - np.repeat(np.cumsum(counts) - counts - first, counts)
+        # the part of the centre line in the row's y band, and the x range of that part - all of it for a flat line
+        w = width[line]
+        top = np.maximum(row * t - w, low[line])
+        bottom = np.minimum(row * t + t + w, high[line])
+        xa = np.where(dy[line] == 0, x1[line], x0[line] + (top - y0[line]) * slope[line])
+        xb = x0[line] + (bottom - y0[line]) * slope[line]
+        left = np.clip((np.minimum(xa, xb) - w) // t, 0, columns - 1).astype(int)
+        right = np.clip((np.maximum(xa, xb) + w) // t, 0, columns - 1).astype(int)
+        # +1 where a span starts, -1 after it ends - a running sum along the row is positive inside spans
+        row *= columns + 1
+        size = rows * (columns + 1)
+        starts = np.bincount(row + left, minlength=size) - np.bincount(row + right + 1, minlength=size)
+        tiles |= np.cumsum(starts.reshape(rows, columns + 1), axis=1)[:, :-1] > 0
+
+# opens the game window, or reuses the one already open - the images and fonts are loaded here, once
+def open_window(caption):
+    assets = flappy_assets.load()
+    win = pygame.display.get_surface()
+    if win is None or win.get_size() != (WIN_WIDTH, WIN_HEIGHT):
+        win = pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT)) # setting up pygame window object
+    pygame.display.set_caption(caption)
+    pygame.display.set_icon(assets.ICON)
+    assets.convert() # to the window's pixel format, once
+    return win
+
+# draws top & bottom pipe - returns their rects
+def draw_pipe(win, pipe):
+    assets = flappy_assets.load()
+    return [win.blit(assets.PIPE_TOP, (pipe.x, pipe.top)),
+            win.blit(assets.PIPE_BOTTOM, (pipe.x, pipe.bottom))]
+
+# will loop base images in continuous manner - renders two images of base at x1 & x2 coords
+def draw_base(win, base):
+    assets = flappy_assets.load()
+    return [win.blit(assets.BASE_IMG, (base.x1, base.y)),
+            win.blit(assets.BASE_IMG, (base.x2, base.y))]
+
+TEXT = TextCache() # HUD text is rendered once and reused until it changes
+SPRITES = RotationCache() # tilted bird images, rotated once per (image, tilt)
+
+# draws a bird image tilted around its center
+def blit_bird(win, img, tilt, x, y):
+    return SPRITES.blit(win, img, tilt, x, y)
+
+# will render all the elements as a whole - screen is a DirtyRenderer, only changed areas are redrawn
+# birds is a BirdPopulation, gen and the rest are God Mode's HUD - manual mode leaves them out and only shows the score
+# overlay is a list of text lines shown under the score, e.g. the profiler's timings
+def draw_window(screen, birds, pipes, base, score, gen=None, alive=0, avgfitness=0, bestfitness=0, overlay=()):
+    win = screen.win
+    assets = flappy_assets.load()
+    STAT_FONT, OTHER_FONT = assets.STAT_FONT, assets.OTHER_FONT
+    screen.begin()
+    rects = []
+    for pipe in pipes:
+        rects += draw_pipe(win, pipe)
+        # pygame.draw.line(win, (0,0,255), (0,0), (pipe.x+(pipe.PIPE_TOP.get_width())/2, pipe.height))
+        # pygame.draw.line(win, (0,0,255), (0,0), (pipe.x+(pipe.PIPE_BOTTOM.get_width())/2, pipe.height+pipe.GAP))
+
+
+    text = TEXT.render(STAT_FONT, "Score: " + str(score), (255,255,255)) # (255,255,255) is the colour
+    rects.append(win.blit(text, (WIN_WIDTH - 10 - text.get_width(), 10)))
+
+    if gen is not None:
+        text = TEXT.render(STAT_FONT, "Gen: " + str(gen), (255,255,255))
+        rects.append(win.blit(text, (10, 50)))
+
+        text = TEXT.render(STAT_FONT, "Alive: " + str(alive), (255,255,255))
+        rects.append(win.blit(text, (10, 10)))
+
+        # fitness changes every frame - the labels stay cached and the numbers are drawn from cached glyphs
+        text = TEXT.render(OTHER_FONT, "Avg Fitness: ", (255,255,255))
+        rects.append(win.blit(text, (10, 90)))
+        rects.append(TEXT.blit_glyphs(win, OTHER_FONT, str(avgfitness), (255,255,255), (10 + text.get_width(), 90)))
+
+        text = TEXT.render(OTHER_FONT, "Best Fitness: ", (255,255,255))
+        rects.append(win.blit(text, (10, 110)))
+        rects.append(TEXT.blit_glyphs(win, OTHER_FONT, str(bestfitness), (255,255,255), (10 + text.get_width(), 110)))
+
+    for i, line in enumerate(overlay):
+        rects.append(TEXT.blit_glyphs(win, OTHER_FONT, line, (255,255,255), (WIN_WIDTH - 180, 60 + 20 * i)))
+
+    rects += draw_base(win, base)
+
+    alive = np.flatnonzero(birds.alive)
+    for i in alive: # every bird gets its own rect, the renderer merges the ones that overlap
+        y = birds.y[i]
+        rects.append(blit_bird(win, assets.BIRD_IMGS[birds.img[i]], birds.tilt[i], birds.x, y))
+        if gen is not None: # what the networks look at
+            pygame.draw.line(win, (0, 100, 0), (birds.x+30, y+30), (pipe.x+pipe.WIDTH/2, pipe.height), 3)
+            pygame.draw.line(win, (0, 100, 0), (birds.x+30, y+30), (pipe.x+pipe.WIDTH/2, pipe.height+pipe.GAP), 3)
+    lines = None
+    if gen is not None and len(alive):
+        # start x, y, end x, y and width of both guide lines of every bird
+        lines = np.empty((2, len(alive), 5))
+        lines[:, :, 0] = birds.x + 30
+        lines[:, :, 1] = birds.y[alive] + 30
+        lines[:, :, 2] = pipe.x + pipe.WIDTH / 2
+        lines[0, :, 3] = pipe.height
+        lines[1, :, 3] = pipe.height + pipe.GAP
+        lines[:, :, 4] = 3
+        lines = lines.reshape(-1, 5)
+    screen.end(rects, lines)
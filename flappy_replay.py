@@ -0,0 +1,62 @@
+import struct, zlib
+import numpy as np
+
+# replay file: header, then the zlib-compressed jump bits of every bird in every frame (one bit per bird per frame)
+# the seed rebuilds the pipe sequence, so together with the jumps it rebuilds the whole game without any network
+MAGIC = b"FBRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBQII") # magic, version, seed, birds, frames
+
+class Replay:
+    def __init__(self, seed, jumps):
+        self.seed = seed
+        self.jumps = jumps # bool array (frames, birds)
+
+    @property
+    def birds(self):
+        return self.jumps.shape[1]
+
+    @property
+    def frames(self):
+        return self.jumps.shape[0]
+
+    # flap mask of a frame, nobody flaps after the recording ends
+    def flaps(self, frame):
+        if frame < self.frames:
+            return self.jumps[frame]
+        return np.zeros(self.birds, dtype=bool)
+
+    def save(self, path):
+        bits = np.packbits(self.jumps, axis=1)
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.seed, self.birds, self.frames))
+            f.write(zlib.compress(bits.tobytes(), 9))
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as f:
+            magic, version, seed, birds, frames = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("{0} is not a version {1} replay file".format(path, VERSION))
+            bits = np.frombuffer(zlib.decompress(f.read()), dtype=np.uint8)
+        jumps = np.unpackbits(bits.reshape(frames, -1), axis=1, count=birds).astype(bool)
+        return Replay(seed, jumps)
+
+class ReplayRecorder:
+    # collects the flap mask of every frame of one episode
+    def __init__(self, seed, birds):
+        self.seed = seed
+        self.birds = birds
+        self.rows = []
+
+    def record(self, flap):
+        self.rows.append(np.packbits(flap))
+
+    def replay(self):
+        if not self.rows:
+            return Replay(self.seed, np.zeros((0, self.birds), dtype=bool))
+        jumps = np.unpackbits(np.array(self.rows), axis=1, count=self.birds).astype(bool)
+        return Replay(self.seed, jumps)
+
+    def save(self, path):
+        self.replay().save(path)
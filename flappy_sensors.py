@@ -0,0 +1,86 @@
+import numpy as np
+
+from flappy_core import WIN_WIDTH, WIN_HEIGHT
+from flappy_population import PipeSet
+
+# what the birds' networks see - the config's num_inputs picks the sensor set
+# every bird flies at the same x, so the pipe ahead is the same for all of them: its geometry is worked out once
+# per frame and only the bird's own height is per row
+CLASSIC = 3 # y, distance to the next gap's top, distance to its bottom - in pixels, what the game always used
+RICH = 7 # normalized: y, velocity, offset to the next gap's top and bottom, distance to the next pipe,
+         # offset to the centre of the gap after it and distance to that pipe (0 and 1 while it has not spawned yet)
+SENSOR_SETS = (CLASSIC, RICH)
+TERMINAL_VELOCITY = 16 # the most a bird falls in one frame, see Bird.move
+
+class Sensors:
+    # fills one preallocated (num_inputs, rows) buffer every frame - no arrays or tuples are made per bird
+    # rows is the most birds the episode has, after a cull only the first rows are used
+    def __init__(self, num_inputs, rows):
+        if num_inputs not in SENSOR_SETS:
+            raise ValueError("num_inputs must be one of {0} (the sensor sets), not {1}".format(SENSOR_SETS, num_inputs))
+        self.num_inputs = num_inputs
+        self.buffer = np.zeros((num_inputs, rows)) # one input per row, the birds along the columns
+        self.gap = np.zeros((2, rows), dtype=int) # each bird's gap top and bottom, when the courses have different pipes
+
+    # inputs of every bird of episode for the pipe ahead of them - an (n, num_inputs) view of the buffer
+    # it is overwritten by the next read()
+    def read(self, episode, pipe):
+        birds = episode.birds
+        n = len(birds)
+        inputs = self.buffer[:, :n]
+        top, bottom = self.gap_of(pipe, birds, n)
+        if self.num_inputs == CLASSIC:
+            inputs[0] = birds.y
+            np.subtract(birds.y, top, out=inputs[1])
+            np.abs(inputs[1], out=inputs[1])
+            np.subtract(birds.y, bottom, out=inputs[2])
+            np.abs(inputs[2], out=inputs[2])
+            return inputs.T
+
+        np.divide(birds.y, WIN_HEIGHT, out=inputs[0])
+        self.velocity(birds, inputs[1])
+        np.subtract(top, birds.y, out=inputs[2])
+        inputs[2] /= WIN_HEIGHT
+        np.subtract(bottom, birds.y, out=inputs[3])
+        inputs[3] /= WIN_HEIGHT
+        inputs[4] = (pipe.x + pipe.WIDTH - birds.x) / WIN_WIDTH
+        after = self.pipe_after(episode, pipe)
+        if after is None:
+            inputs[5] = 0.0
+            inputs[6] = 1.0
+        else:
+            top, bottom = self.gap_of(after, birds, n)
+            np.add(top, bottom, out=inputs[5])
+            inputs[5] *= 0.5
+            inputs[5] -= birds.y
+            inputs[5] /= WIN_HEIGHT
+            inputs[6] = (after.x + after.WIDTH - birds.x) / WIN_WIDTH
+        return inputs.T
+
+    # gap top and bottom for every bird - scalars for a Pipe, each row's own course of a PipeSet (in the gap rows)
+    def gap_of(self, pipe, birds, n):
+        if not isinstance(pipe, PipeSet):
+            return pipe.height, pipe.bottom
+        top, bottom = self.gap[0, :n], self.gap[1, :n]
+        np.take(pipe.height, birds.course, out=top)
+        np.take(pipe.bottom, birds.course, out=bottom)
+        return top, bottom
+
+    # the distance each bird moved in its last move, over TERMINAL_VELOCITY - the same arithmetic as BirdPopulation.move
+    @staticmethod
+    def velocity(birds, out):
+        t = birds.tick_count
+        np.multiply(birds.vel, t, out=out)
+        out += 1.5 * t * t
+        np.minimum(out, TERMINAL_VELOCITY, out=out)
+        out[out < 0] -= 2
+        out /= TERMINAL_VELOCITY
+
+    # the pipe after the one the birds are heading for, None until it is spawned
+    @staticmethod
+    def pipe_after(episode, pipe):
+        pipes = episode.pipes
+        for i, p in enumerate(pipes[:-1]):
+            if p is pipe:
+                return pipes[i + 1]
+        return None
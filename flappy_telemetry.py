@@ -0,0 +1,106 @@
+import json, queue, threading, time
+
+# training metrics as an append-only JSONL file, one object per line with a "kind" field:
+#   generation - best/avg fitness of the population, species, streamed stats (of the genomes' aggregate fitness
+#                with several courses) and evaluation throughput
+#   frame      - birds alive, score and best/avg fitness every few frames of a game played in this process - with several
+#                courses these count every bird of every course, a genome on one course each
+#   dropped    - how many records were thrown away because the writer fell behind
+# the game loop only appends a tuple to a list - a background thread turns batches of them into lines and writes them,
+# so the loop never waits for the disk, and a crash loses at most the batch that was still being filled
+FIELDS = {
+    "frame": ("generation", "frame", "alive", "score", "best", "avg"),
+    "generation": ("generation", "best", "avg", "species", "genomes", "streamed_best", "streamed_avg", "seconds", "genomes_per_second"),
+}
+
+class Telemetry:
+    # records are handed to the writer every batch records or every interval seconds, whichever comes first
+    # at most pending batches wait for the writer - when it falls further behind new batches are dropped and counted,
+    # memory stays bounded and the game keeps its pace
+    def __init__(self, path, batch=512, interval=1.0, pending=64, frame_every=10):
+        self.path = path
+        self.batch = batch
+        self.interval = interval
+        self.frame_every = frame_every # a frame record every this many frames, 0 = none
+        self.records = [] # (kind, values) of the batch being filled
+        self.handed = time.monotonic() # when the last batch went to the writer
+        self.dropped = 0 # records of dropped batches, reported by the writer
+        self.queue = queue.Queue(pending)
+        self.file = open(path, "a")
+        self.thread = threading.Thread(target=self.write, name="telemetry", daemon=True)
+        self.thread.start()
+
+    # a record of kind with values in the order of FIELDS[kind] - never blocks
+    def emit(self, kind, values):
+        self.records.append((kind, values))
+        if len(self.records) >= self.batch or time.monotonic() - self.handed >= self.interval:
+            self.flush()
+
+    # the state of an Episode after one of its frames, when that frame is due
+    def frame(self, gen, episode):
+        if self.frame_every and episode.frames % self.frame_every == 0:
+            stats = episode.stats
+            self.emit("frame", (gen, episode.frames, int(episode.birds.alive.sum()), episode.score, stats.best, stats.mean))
+
+    # hands the current batch to the writer - never blocks
+    def flush(self):
+        self.handed = time.monotonic()
+        if not self.records:
+            return
+        records, self.records = self.records, []
+        try:
+            self.queue.put_nowait(records)
+        except queue.Full:
+            self.dropped += len(records)
+
+    # hands over what is left and waits until the writer has written it - the only call that waits for the writer
+    def close(self):
+        if self.thread is None:
+            return
+        if self.records:
+            self.queue.put(self.records)
+            self.records = []
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+        self.file.close()
+
+    # writer thread: every batch becomes one write of its lines, flushed to the OS before the next batch is taken
+    def write(self):
+        reported = 0
+        while True:
+            records = self.queue.get()
+            lines = []
+            for kind, values in records or ():
+                record = {"kind": kind}
+                record.update(zip(FIELDS[kind], values))
+                lines.append(json.dumps(record))
+            dropped = self.dropped
+            if dropped != reported:
+                lines.append(json.dumps({"kind": "dropped", "records": dropped - reported}))
+                reported = dropped
+            if lines:
+                self.file.write("\n".join(lines) + "\n")
+                self.file.flush()
+            if records is None:
+                return
+
+# the records of a telemetry file, optionally only those of one kind - a line cut off by a crash is skipped
+def read(path, kind=None):
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if kind is None or record["kind"] == kind:
+                records.append(record)
+    return records
+
+# python flappy_telemetry.py FILE prints the generation records of a telemetry file
+if __name__ == "__main__":
+    import sys
+    for record in read(sys.argv[1], "generation"):
+        print("gen {0}: best {1:.2f}, avg {2:.2f}, {3} species, {4:.0f} genomes/s".format(record["generation"], record["best"],
+                record["avg"], record["species"], record["genomes_per_second"]))
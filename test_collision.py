@@ -0,0 +1,99 @@
+import os, random, subprocess, sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # masks come from the images, no window needed
+
+import numpy as np
+import pygame
+
+import flappy_assets, flappy_core
+from flappy_core import Bird, Pipe, masks
+from flappy_population import BirdPopulation, PipeSet, collide_population
+
+# collisions of the cached masks and the bounding-box rejection must give exactly the hits pygame's own masks give
+# pygame.mask.from_surface of the images is the reference, computed fresh and without any shortcut
+
+def reference_masks():
+    images = flappy_assets.decode_images()
+    return ([pygame.mask.from_surface(images["bird{0}".format(i)]) for i in range(3)],
+            pygame.mask.from_surface(images["pipe_top"]), pygame.mask.from_surface(images["pipe_bottom"]))
+
+BIRD_MASKS, TOP_MASK, BOTTOM_MASK = reference_masks()
+
+# the hit test the game did before masks were cached: both pipe masks against the bird's mask
+def reference_hit(pipe, img, x, y):
+    y = round(y)
+    return bool(BIRD_MASKS[img].overlap(TOP_MASK, (pipe.x - x, pipe.top - y)) or
+            BIRD_MASKS[img].overlap(BOTTOM_MASK, (pipe.x - x, pipe.bottom - y)))
+
+# seeded flocks flapping at random past seeded pipes - every frame, every bird is checked three ways
+def test_recorded_trajectories_hit_like_pygame():
+    rng = np.random.default_rng(5)
+    hits = 0
+    for seed in range(3):
+        birds = BirdPopulation(60, 230, 350)
+        pipes = [Pipe(600, random.Random(seed)), Pipe(300, random.Random(seed + 100))]
+        for frame in range(250):
+            birds.move()
+            birds.animate()
+            birds.jump(rng.random(len(birds)) < 0.08)
+            np.clip(birds.y, -60, 800, out=birds.y) # keep them near the pipes instead of letting them fall away
+            for pipe in pipes:
+                hit = collide_population(pipe, birds)
+                for i in range(len(birds)):
+                    bird = Bird(birds.x, birds.y[i])
+                    bird.img = int(birds.img[i])
+                    expected = reference_hit(pipe, bird.img, birds.x, birds.y[i])
+                    assert hit[i] == expected == pipe.collide(bird), (seed, frame, i)
+                    hits += expected
+                pipe.move()
+                if pipe.x < -Pipe.WIDTH:
+                    pipe.x = 600
+                    pipe.set_height()
+    assert hits > 0 # the trajectories do hit pipes, or the test proves nothing
+
+# birds on several courses are tested against their own course's pipes
+def test_pipe_set_hits_each_course():
+    rngs = [random.Random(k) for k in range(4)]
+    birds = BirdPopulation(40, 230, 0)
+    birds.course = np.arange(40) % 4
+    birds.img = np.arange(40) % 3
+    pipes = PipeSet(230, rngs)
+    for y in range(0, 800, 7):
+        birds.y[:] = y + np.arange(40) % 5
+        hit = collide_population(pipes, birds)
+        for i in range(len(birds)):
+            assert hit[i] == reference_hit(pipes.course(birds.course[i]), birds.img[i], birds.x, birds.y[i])
+
+# flappy_core.Mask, the display-free mask of the headless core, against pygame.mask at random offsets
+def test_core_mask_overlap_matches_pygame():
+    core = masks()
+    pipe_masks = {"pipe_top": TOP_MASK, "pipe_bottom": BOTTOM_MASK}
+    rng = random.Random(0)
+    touching = 0
+    for _ in range(20000):
+        img = rng.randrange(3)
+        name = rng.choice(sorted(pipe_masks))
+        offset = (rng.randrange(-120, 80), rng.randrange(-700, 60))
+        expected = BIRD_MASKS[img].overlap(pipe_masks[name], offset) is not None
+        assert core["bird"][img].overlap(core[name], offset) == expected, (img, name, offset)
+        touching += expected
+    assert touching > 0
+
+# the masks hold the same solid pixels as pygame's
+def test_core_masks_have_pygame_pixels():
+    core = masks()
+    for mask, expected in zip(core["bird"] + [core["pipe_top"], core["pipe_bottom"]], BIRD_MASKS + [TOP_MASK, BOTTOM_MASK]):
+        assert isinstance(mask, flappy_core.Mask)
+        assert (mask.width, mask.height) == expected.get_size()
+        for y in range(mask.height):
+            for x in range(mask.width):
+                assert bool(mask.rows[y] >> x & 1) == bool(expected.get_at((x, y)))
+
+# with an up-to-date atlas the display-free core collides without ever importing pygame
+def test_core_collides_without_pygame():
+    masks() # builds the atlas if it is missing or stale
+    code = ("import sys, flappy_core\n"
+            "pipe = flappy_core.Pipe(230)\n"
+            "assert pipe.collide(flappy_core.Bird(230, pipe.height - 10))\n"
+            "assert 'pygame' not in sys.modules\n")
+    subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
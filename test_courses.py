@@ -0,0 +1,29 @@
+import os
+
+os.environ["FLAPPY_HEADLESS"] = "1" # no window, SDL's dummy driver
+
+import numpy as np
+
+import flappy_bird_ai as ai
+from flappy_population import Budget, Courses
+from test_nn import load_config, random_genomes
+
+# several courses in one Episode are K games at once: course k of seed plays exactly like a game of seed + k alone
+
+# fitness play() gives every genome
+def fitness(genomes, config, seed, courses):
+    stats = ai.play([(g.key, g) for g in genomes], config, seed=seed, budget=Budget(1500), courses=courses)
+    return np.array([g.fitness for g in genomes]), stats
+
+def test_courses_play_like_separate_games():
+    config = load_config()
+    genomes = random_genomes(config, 150)
+    courses = Courses(3, "min")
+    played, stats = fitness(genomes, config, 7, courses)
+    rows = np.concatenate([fitness(genomes, config, 7 + k, Courses())[0] for k in range(3)]) # course after course
+    assert len(set(rows.tolist())) > 4 # birds died on different frames
+    assert not np.array_equal(rows[:150], rows[150:300]) # and the courses differ
+    assert np.array_equal(played, courses.fitness(rows))
+    # the stats are those of the genomes' aggregate fitness, not of single courses
+    assert stats.count == len(genomes)
+    assert np.isclose(stats.mean, played.mean()) and stats.best == played.max()
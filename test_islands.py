@@ -0,0 +1,29 @@
+import os, pickle, multiprocessing
+
+import flappy_islands
+
+# the coordinator must end, and say why, whatever happens to its islands - an island that fails reports an error,
+# one that is killed never reports, one stopped before its first generation has no genome
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config-feedforward.txt")
+
+# an island killed before it could report anything
+def vanish(index, *args):
+    os._exit(3)
+
+def test_failing_islands_end_the_run(capsys):
+    assert flappy_islands.run(os.path.join(os.path.dirname(CONFIG_PATH), "missing.txt"), islands=2, generations=1, winner_path=None) is None
+    out = capsys.readouterr().out
+    assert "Island 0 failed" in out and "Island 1 failed" in out and "nothing to save" in out
+
+def test_killed_islands_end_the_run(capsys, monkeypatch):
+    monkeypatch.setattr(flappy_islands, "island", vanish)
+    assert flappy_islands.run(CONFIG_PATH, islands=2, generations=1, winner_path=None) is None
+    assert capsys.readouterr().out.count("exited with code 3 without reporting") >= 2
+
+def test_stopped_island_reports_no_genome():
+    reports, stop = multiprocessing.Queue(), multiprocessing.Event()
+    stop.set()
+    flappy_islands.island(0, CONFIG_PATH, 5, 1, 2, 0, multiprocessing.Queue(), multiprocessing.Queue(), reports, stop)
+    kind, index, generation, genome = reports.get(timeout=5)[:4]
+    assert (kind, index, generation, pickle.loads(genome)) == ("done", 0, 0, None)
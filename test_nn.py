@@ -0,0 +1,64 @@
+import os, random
+
+import neat
+import numpy as np
+
+from flappy_nn import BatchNetwork
+
+# BatchNetwork must give the outputs of neat's FeedForwardNetwork.activate for every genome of a population
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config-feedforward.txt")
+
+# count genomes grown by random mutations - hidden nodes, new and disabled connections, so the nets differ in shape
+def random_genomes(config, count=300, seed=0):
+    random.seed(seed)
+    genomes = []
+    for key in range(count):
+        g = neat.DefaultGenome(key)
+        g.configure_new(config.genome_config)
+        for _ in range(random.randrange(30)):
+            g.mutate(config.genome_config)
+        genomes.append(g)
+    return genomes
+
+def load_config():
+    return neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
+            neat.DefaultSpeciesSet, neat.DefaultStagnation, CONFIG_PATH)
+
+# largest difference between the batch and every net's own activate over a few rounds of random inputs
+def worst_difference(batch, nets, rng):
+    worst = 0.0
+    for _ in range(10):
+        inputs = rng.uniform(-800, 800, (len(nets), batch.num_inputs))
+        expected = np.array([net.activate(row) for net, row in zip(nets, inputs.tolist())])
+        worst = max(worst, np.abs(batch.activate(inputs) - expected).max())
+    return worst
+
+def test_matches_feed_forward_network():
+    config = load_config()
+    nets = [neat.nn.FeedForwardNetwork.create(g, config) for g in random_genomes(config)]
+    assert worst_difference(BatchNetwork(nets), nets, np.random.default_rng(0)) < 1e-9
+
+# after dropping rows, like a BirdPopulation cull does, the remaining rows are still their nets
+def test_keep_rows():
+    config = load_config()
+    nets = [neat.nn.FeedForwardNetwork.create(g, config) for g in random_genomes(config)]
+    batch = BatchNetwork(nets)
+    rng = np.random.default_rng(1)
+    keep = rng.random(len(nets)) < 0.5
+    batch.keep_rows(keep)
+    nets = [net for net, k in zip(nets, keep) if k]
+    assert len(batch) == len(nets)
+    assert worst_difference(batch, nets, rng) < 1e-9
+    rows = rng.permutation(len(nets))[:len(nets) // 2] # row indices, in any order
+    batch.keep_rows(rows)
+    assert worst_difference(batch, [nets[i] for i in rows], rng) < 1e-9
+
+def test_rows_identical():
+    config = load_config()
+    genomes = random_genomes(config, 50)
+    batch = BatchNetwork.create(genomes + genomes[:1], config) # row 50 is a copy of row 0
+    assert batch.rows_identical([0, 50])
+    assert not batch.rows_identical([0, 1, 50])
+    # copies made by keep_rows, the way several courses tile the population
+    batch.keep_rows(np.tile(np.arange(len(batch)), 2))
+    assert batch.rows_identical([3, 3 + 51])
@@ -0,0 +1,26 @@
+import neat
+import numpy as np
+
+from flappy_policy import Policy, export
+from test_nn import load_config, random_genomes
+
+# an exported policy gives exactly the outputs of neat's FeedForwardNetwork.activate, also after a round trip through
+# either file format
+
+# the inputs on which every policy and net are compared
+def inputs(config, rng):
+    return rng.uniform(-800, 800, (20, config.genome_config.num_inputs)).tolist()
+
+def test_export_matches_feed_forward_network(tmp_path):
+    config = load_config()
+    rng = np.random.default_rng(0)
+    for g in random_genomes(config, 100):
+        net = neat.nn.FeedForwardNetwork.create(g, config)
+        policy = export(g, config)
+        policy.save(str(tmp_path / "policy.json"))
+        policy.save(str(tmp_path / "policy.bin"))
+        policies = [policy, Policy.load(str(tmp_path / "policy.json")), Policy.load(str(tmp_path / "policy.bin"))]
+        for row in inputs(config, rng):
+            expected = net.activate(row)
+            for p in policies:
+                assert p.activate(row) == expected, g.key
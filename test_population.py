@@ -0,0 +1,66 @@
+import neat
+import numpy as np
+
+from flappy_core import Bird
+from flappy_nn import BatchNetwork
+from flappy_population import BirdPopulation, Budget, Episode
+from flappy_sensors import Sensors
+from test_nn import load_config, random_genomes
+
+# BirdPopulation moves, flaps and animates every bird exactly like flappy_core.Bird does for one bird
+
+# the per-bird state, as BirdPopulation holds it, of a list of Birds
+def bird_state(birds):
+    return [np.array([getattr(bird, name) for bird in birds]) for name in ("y", "tilt", "tick_count", "vel", "height", "img_count", "img")]
+
+def population_state(population):
+    return [population.y, population.tilt, population.tick_count, population.vel, population.height,
+            population.img_count, population.img]
+
+def test_population_moves_like_birds():
+    rng = np.random.default_rng(3)
+    population = BirdPopulation(200, 230, 350)
+    birds = [Bird(230, 350) for _ in range(200)]
+    for frame in range(500):
+        population.move()
+        population.animate()
+        for bird in birds:
+            bird.move()
+            bird.animate()
+        jumps = rng.random(200) < 0.06
+        population.jump(jumps)
+        for bird, jump in zip(birds, jumps):
+            if jump:
+                bird.jump()
+        for expected, actual in zip(bird_state(birds), population_state(population)):
+            assert np.array_equal(expected, actual), frame
+
+# a game of the genomes that checks, every frame, that each row's network is that of the genome in birds.index
+def game(genomes, config, seed):
+    nets = BatchNetwork.create(genomes, config)
+    own = [neat.nn.FeedForwardNetwork.create(g, config) for g in genomes]
+    episode = Episode(len(genomes), seed, Budget(1500))
+    episode.on_cull = nets.keep_rows
+    sensors = Sensors(config.genome_config.num_inputs, len(genomes))
+
+    def decide(episode, pipe):
+        inputs = sensors.read(episode, pipe)
+        outputs = nets.activate(inputs)
+        expected = [own[i].activate(row) for i, row in zip(episode.birds.index, inputs.tolist())]
+        assert np.abs(outputs - expected).max() < 1e-9
+        return outputs[:, 0] > 0.5
+
+    while not episode.over:
+        episode.step(decide)
+    return episode.birds.all_fitness(), episode
+
+# culls drop rows of the birds and, through on_cull, of the networks - every row still has its own genome's net
+# and every culled bird's fitness goes to its genome: each genome scores what it scores playing the seed alone
+def test_culled_birds_keep_their_genome():
+    config = load_config()
+    genomes = random_genomes(config, 150)
+    fitness, episode = game(genomes, config, 4)
+    assert len(episode.birds) < len(genomes) # birds were culled, or the test proves nothing
+    assert len(set(fitness.tolist())) > 4 # birds died on different frames
+    for g, expected in zip(genomes, fitness):
+        assert game([g], config, 4)[0][0] == expected
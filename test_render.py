@@ -0,0 +1,45 @@
+import os
+
+os.environ["FLAPPY_HEADLESS"] = "1" # no window, SDL's dummy driver
+
+import numpy as np
+import pygame
+
+import flappy_assets
+import flappy_bird_ai as ai
+from flappy_population import Episode
+from flappy_render import DirtyRenderer, open_window
+
+# the dirty renderer only redraws and updates parts of the window - what reaches the display has to be exactly the
+# frame a full redraw gives, so no pixel that changed may lie outside the rects it updates
+# the dummy driver shows nothing, so pygame.display.update is replaced by a copy of the updated rects to a surface
+
+def pixels(surface):
+    return pygame.image.tobytes(surface, "RGB")
+
+def test_dirty_frames_match_full_redraws(monkeypatch):
+    win = open_window("test")
+    shown = win.copy() # what the display shows - only what display.update hands it changes
+    updates = []
+    monkeypatch.setattr(pygame.display, "update", lambda rects=None: updates.append(rects))
+    background = flappy_assets.load().BG_IMG
+    screen = DirtyRenderer(win, background)
+    rng = np.random.default_rng(2)
+    episode = Episode(30, 8)
+    partial = 0
+    for frame in range(300):
+        if episode.over:
+            break
+        episode.step(lambda episode, pipe: episode.birds.y + rng.normal(0, 8, len(episode.birds)) > pipe.height + 110)
+        if frame == 200:
+            screen.invalidate()
+        partial += screen.drawn is not None and screen.cover(screen.drawn) is not None
+        ai.draw_episode(screen, episode, 1, overlay=["frame {0}".format(frame)])
+        for rects in updates:
+            for rect in [win.get_rect()] if rects is None else rects:
+                shown.blit(win, rect, rect)
+        full = DirtyRenderer(win.copy(), background) # a renderer that has drawn nothing yet redraws everything
+        ai.draw_episode(full, episode, 1, overlay=["frame {0}".format(frame)])
+        del updates[:] # the full redraw's update shows nothing
+        assert pixels(full.win) == pixels(win) == pixels(shown), frame
+    assert frame > 250 and partial > 200 # most frames were partial updates of a long game
@@ -0,0 +1,102 @@
+import os, random
+
+os.environ["FLAPPY_HEADLESS"] = "1" # no window, SDL's dummy driver
+
+import numpy as np
+import neat
+import pytest
+
+import flappy_bird_ai as ai
+from flappy_population import Budget, Episode
+from flappy_replay import Replay, ReplayRecorder
+
+# a replay holds only the seed and the flaps - playing them back has to rebuild the recorded game exactly
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config-feedforward.txt")
+
+def genomes(config, seed=3):
+    random.seed(seed)
+    return list(neat.Population(config).population.items())
+
+# the state of an Episode that matters on screen and for fitness
+def state(episode):
+    return (episode.frames, episode.score, episode.birds.y.tobytes(), episode.birds.all_fitness().tobytes(),
+            [(pipe.x, pipe.height) for pipe in episode.pipes], episode.base.x1, episode.over)
+
+# a game of birds that mostly hold the gap, recorded and saved - the budget stops it with birds still alive
+@pytest.fixture(scope="module")
+def recorded(tmp_path_factory):
+    rng = np.random.default_rng(1)
+    episode = Episode(20, 11, Budget(2000))
+    recorder = ReplayRecorder(11, 20)
+    while not episode.over:
+        recorder.record(episode.step(lambda episode, pipe: episode.birds.y + rng.normal(0, 5, len(episode.birds)) > pipe.height + 120))
+    assert episode.birds.alive.any()
+    path = str(tmp_path_factory.mktemp("replay") / "game.replay")
+    recorder.save(path)
+    return Replay.load(path), episode.birds.all_fitness()
+
+def test_replay_rebuilds_the_game(recorded):
+    replay, fitness = recorded
+    episode = ai.Seeker(replay).seek(10 ** 9)
+    assert episode.frames == replay.frames == 2000
+    assert np.array_equal(episode.birds.all_fitness(), fitness)
+
+# the flaps play() records for a population rebuild the fitness it gave every genome
+def test_played_generation_replays():
+    config = ai.load_config(CONFIG_PATH)
+    population = genomes(config)
+    recorder = ReplayRecorder(5, len(population))
+    ai.play(population, config, seed=5, recorder=recorder, budget=Budget(3000))
+    episode = ai.Seeker(recorder.replay()).seek(10 ** 9)
+    assert np.array_equal(episode.birds.all_fitness(), [g.fitness for _, g in population])
+
+def test_replay_file_round_trip(recorded, tmp_path):
+    replay, fitness = recorded
+    path = str(tmp_path / "again.replay")
+    replay.save(path)
+    again = Replay.load(path)
+    assert again.seed == replay.seed and np.array_equal(again.jumps, replay.jumps)
+
+# playback stops where the recording does, also when birds were still alive then
+def test_playback_ends_with_the_recording(recorded):
+    replay, fitness = recorded
+    seeker = ai.Seeker(replay)
+    episode = seeker.seek(replay.frames - 5)
+    assert not seeker.ended(episode)
+    episode = seeker.seek(replay.frames + 500)
+    assert seeker.ended(episode) and episode.frames == replay.frames and not episode.over
+
+# seeking from a snapshot gives the Episode that replaying from frame 0 gives
+def test_seek_matches_replaying_from_the_start(recorded):
+    replay, fitness = recorded
+    seeker = ai.Seeker(replay)
+    def from_start(frame):
+        episode = Episode(replay.birds, replay.seed)
+        while episode.frames < frame and not episode.over:
+            episode.step(seeker.decide)
+        return episode
+    for frame in [replay.frames - 1] + random.Random(0).sample(range(replay.frames), 15):
+        assert state(seeker.seek(frame)) == state(from_start(frame)), frame
+    assert len(seeker.frames) > 1 # the seeks made snapshots
+    # playback after a seek continues like the recorded game
+    episode = seeker.seek(700)
+    while episode.frames < 1200:
+        episode.advance(seeker.decide, 3, ai.Interpolator())
+        seeker.keep(episode)
+    assert state(episode) == state(from_start(episode.frames))
+
+# a genome played alone always has a frame limit, even when the config sets none
+def test_solo_budget_is_capped():
+    config = ai.load_config(CONFIG_PATH)
+    config.budget = Budget(0)
+    assert ai.solo_budget(config).max_frames == ai.SOLO_FRAMES
+    config.budget = Budget(500)
+    assert ai.solo_budget(config).max_frames == 500
+
+# a run without replay_dir saves no replays, even after a run that had one
+def test_run_forgets_the_replay_dir(tmp_path):
+    ai.run(CONFIG_PATH, 1, checkpoint_every=0, winner_path=None, replay_dir=str(tmp_path), max_frames=100)
+    assert (tmp_path / "gen-1.replay").exists()
+    ai.run(CONFIG_PATH, 1, checkpoint_every=0, winner_path=None, max_frames=100)
+    assert ai.REPLAY_DIR is None
+    assert not (tmp_path / "gen-2.replay").exists() and sorted(os.listdir(tmp_path)) == ["gen-1.replay", "winner.replay"]
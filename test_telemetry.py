@@ -0,0 +1,80 @@
+import os, threading
+
+os.environ["FLAPPY_HEADLESS"] = "1" # no window, SDL's dummy driver
+
+import numpy as np
+
+import flappy_bird_ai as ai
+from flappy_loop import Interpolator
+from flappy_population import Budget, Episode
+from flappy_render import open_window
+from flappy_telemetry import Telemetry, read
+from test_nn import load_config, random_genomes
+
+# frame records come once per due tick of a game however its ticks are grouped into drawn frames, the writer
+# counts what it had to drop, close() writes everything else, and read() survives a line cut off by a crash
+
+def frame_record(frame):
+    return (1, frame, 10, 0, 1.0, 0.5)
+
+def test_frames_are_unique_and_evenly_spaced(tmp_path):
+    telemetry = Telemetry(str(tmp_path / "ticks.jsonl"), frame_every=10)
+    rng = np.random.default_rng(4)
+    episode = Episode(20, 6, Budget(400))
+    while not episode.over: # 0 to 6 ticks per drawn frame, like a window that can't keep up or runs fast forward
+        episode.advance(lambda episode, pipe: episode.birds.y > pipe.height + 120, int(rng.integers(7)), Interpolator(),
+                observe=lambda episode: telemetry.frame(1, episode))
+    telemetry.close()
+    assert [record["frame"] for record in read(telemetry.path, "frame")] == list(range(10, 401, 10))
+
+# the same from a game drawn in a window
+def test_played_frames_are_unique_and_evenly_spaced(tmp_path):
+    config = load_config()
+    telemetry = Telemetry(str(tmp_path / "play.jsonl"), frame_every=10)
+    ai.play([(g.key, g) for g in random_genomes(config, 150)], config, open_window("test"), seed=4, budget=Budget(60), telemetry=telemetry)
+    telemetry.close()
+    assert [record["frame"] for record in read(telemetry.path, "frame")] == list(range(10, 61, 10))
+
+class SlowFile:
+    # a file whose writes wait until release is set - a disk that has fallen behind
+    def __init__(self, f):
+        self.f = f
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.writing.set()
+        self.release.wait()
+        self.f.write(text)
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+def test_dropped_records_are_counted(tmp_path):
+    telemetry = Telemetry(str(tmp_path / "slow.jsonl"), batch=1, pending=1)
+    slow = telemetry.file = SlowFile(telemetry.file)
+    telemetry.emit("frame", frame_record(0))
+    slow.writing.wait(5) # the writer is stuck on the first record
+    for frame in range(1, 10): # one more fits in the queue, the other 8 are dropped
+        telemetry.emit("frame", frame_record(frame))
+    assert telemetry.dropped == 8
+    slow.release.set()
+    telemetry.close()
+    assert [record["frame"] for record in read(telemetry.path, "frame")] == [0, 1]
+    assert [record["records"] for record in read(telemetry.path, "dropped")] == [8]
+
+def test_close_writes_everything(tmp_path):
+    telemetry = Telemetry(str(tmp_path / "close.jsonl"), batch=1000, interval=1000)
+    for frame in range(100):
+        telemetry.emit("frame", frame_record(frame))
+    telemetry.close()
+    assert [record["frame"] for record in read(telemetry.path)] == list(range(100))
+
+def test_read_skips_a_truncated_line(tmp_path):
+    path = tmp_path / "crash.jsonl"
+    path.write_text('{"kind": "generation", "generation": 1}\n{"kind": "frame", "generation": 1}\n{"kind": "fra')
+    assert [record["kind"] for record in read(str(path))] == ["generation", "frame"]
+    assert len(read(str(path), "generation")) == 1